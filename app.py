@@ -1,40 +1,1068 @@
-from flask import Flask, request, jsonify, make_response, render_template_string, session, redirect, url_for
-from flask_mysqldb import MySQL
+from flask import Flask, request, jsonify, make_response, session, redirect, url_for, Response, stream_with_context, g, has_app_context
+import MySQLdb
+import MySQLdb.cursors
 import jwt
 import datetime
+import json
 from functools import wraps
-import xml.dom.minidom
-from xml.etree.ElementTree import Element, SubElement, tostring
+from contextlib import contextmanager
+from xml.etree.ElementTree import Element, SubElement, tostring, indent
 import hashlib
+import base64
+import zlib
 import os
+import sys
+import csv
+import io
+import threading
+import time
+import math
+import random
+import cProfile
+import pstats
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict, deque
+from markupsafe import Markup
+from urllib.parse import urlencode
+import templates
 
 app = Flask(__name__)
 app.config.from_object('config.Config')
 app.secret_key = os.environ.get('SECRET_KEY', 'student-api-secret-key')
-mysql = MySQL(app)
+
+# === INSTRUMENTATION ===
+# Per-request accounting lives on g: phase() adds wall time to a named
+# phase (auth, db, serialize, render) and the cursor classes below count
+# queries and fetched rows. after_request folds it into the process-wide
+# histograms served at /metrics.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.latency = {}
+        self.phases = {}
+        self.queries = {}
+        self.rows = Counter()
+        self.admission = Counter()
+
+    def observe(self, route, method, status, elapsed, acc):
+        with self.lock:
+            self.requests[(route, method, status)] += 1
+            self._histogram(self.latency, (route, method), LATENCY_BUCKETS).observe(elapsed)
+            for name, seconds in acc['phases'].items():
+                self._histogram(self.phases, (route, name), LATENCY_BUCKETS).observe(seconds)
+            self._histogram(self.queries, (route,), QUERY_BUCKETS).observe(acc['queries'])
+            self.rows[route] += acc['rows']
+
+    def admitted(self, decision, reason):
+        with self.lock:
+            self.admission[(decision, reason)] += 1
+
+    def _histogram(self, table, key, buckets):
+        hist = table.get(key)
+        if hist is None:
+            hist = table[key] = Histogram(buckets)
+        return hist
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines += prom_header('http_requests_total', 'counter', 'Requests by route, method and status')
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(prom_line('http_requests_total', {'route': route, 'method': method, 'status': status}, count))
+            lines += prom_histogram('http_request_duration_seconds', 'Request latency by route', ('route', 'method'), self.latency)
+            lines += prom_histogram('http_request_phase_seconds', 'Time per request spent in each phase', ('route', 'phase'), self.phases)
+            lines += prom_histogram('db_queries_per_request', 'SQL statements executed per request', ('route',), self.queries)
+            lines += prom_header('db_rows_fetched_total', 'counter', 'Rows fetched from the database')
+            for route, count in sorted(self.rows.items()):
+                lines.append(prom_line('db_rows_fetched_total', {'route': route}, count))
+            lines += prom_header('admission_requests_total', 'counter', 'Authenticated requests admitted or rejected by admission control')
+            for (decision, reason), count in sorted(self.admission.items()):
+                lines.append(prom_line('admission_requests_total', {'decision': decision, 'reason': reason}, count))
+        return lines
+
+def prom_escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prom_header(name, kind, text):
+    return [f'# HELP {name} {text}', f'# TYPE {name} {kind}']
+
+def prom_line(name, labels, value):
+    if labels:
+        name += '{' + ','.join(f'{k}="{prom_escape(v)}"' for k, v in labels.items()) + '}'
+    return f'{name} {value}'
+
+def prom_histogram(name, text, label_names, table):
+    lines = prom_header(name, 'histogram', text)
+    for key, hist in sorted(table.items()):
+        labels = dict(zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(hist.buckets + ('+Inf',), hist.counts):
+            cumulative += count
+            lines.append(prom_line(name + '_bucket', dict(labels, le=bound), cumulative))
+        lines.append(prom_line(name + '_sum', labels, round(hist.sum, 6)))
+        lines.append(prom_line(name + '_count', labels, hist.count))
+    return lines
+
+metrics = Metrics()
+
+def request_metrics():
+    return g.get('_metrics') if has_app_context() else None
+
+@contextmanager
+def phase(name):
+    acc = request_metrics()
+    if acc is None or name in acc['active']:
+        yield
+        return
+    acc['active'].add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        acc['phases'][name] += time.perf_counter() - start
+        acc['active'].discard(name)
+
+class CursorMetricsMixin:
+    def execute(self, query, args=None):
+        acc = request_metrics()
+        if acc is not None:
+            acc['queries'] += 1
+        with phase('db'):
+            return super().execute(query, args)
+
+    def executemany(self, query, args):
+        acc = request_metrics()
+        if acc is not None:
+            acc['queries'] += 1
+        with phase('db'):
+            return super().executemany(query, args)
+
+    def _count_rows(self, rows):
+        acc = request_metrics()
+        if acc is not None:
+            acc['rows'] += len(rows)
+        return rows
+
+    def fetchone(self):
+        with phase('db'):
+            row = super().fetchone()
+        acc = request_metrics()
+        if acc is not None and row is not None:
+            acc['rows'] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        with phase('db'):
+            return self._count_rows(super().fetchmany(size))
+
+    def fetchall(self):
+        with phase('db'):
+            return self._count_rows(super().fetchall())
+
+class MetricsCursor(CursorMetricsMixin, MySQLdb.cursors.Cursor):
+    pass
+
+class MetricsSSCursor(CursorMetricsMixin, MySQLdb.cursors.SSCursor):
+    pass
+
+@app.before_request
+def start_request_metrics():
+    g._metrics = {'start': time.perf_counter(), 'phases': defaultdict(float), 'active': set(), 'queries': 0, 'rows': 0}
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            g._profiler = profiler
+        except ValueError:
+            pass
+
+@app.after_request
+def record_request_metrics(resp):
+    acc = g.get('_metrics')
+    if acc is None:
+        return resp
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    method, path, status = request.method, request.full_path, resp.status_code
+    profiler = g.pop('_profiler', None)
+
+    def record():
+        elapsed = time.perf_counter() - acc['start']
+        metrics.observe(route, method, status, elapsed, acc)
+        if profiler is not None:
+            profiler.disable()
+            if elapsed * 1000 >= app.config['PROFILE_SLOW_MS']:
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+                app.logger.warning('Slow request %s %s took %.1f ms\n%s', method, path, elapsed * 1000, out.getvalue())
+
+    if resp.is_streamed:
+        # A streamed body runs its queries after this hook: leave the
+        # accumulator on g for the generator and record once the server
+        # closes the response, as hand_off_expensive_slot does
+        resp.call_on_close(record)
+    else:
+        g.pop('_metrics', None)
+        record()
+    return resp
+
+# === CONNECTION POOL ===
+# Connections are checked out once per app context (mysql.connection) and
+# returned on teardown, so requests reuse authenticated connections instead
+# of opening a new one each time.
+class PoolTimeout(Exception):
+    pass
+
+class MySQLPool:
+    def __init__(self, app=None, connect=None):
+        self.connect = connect
+        self.cond = threading.Condition()
+        self.idle = deque()
+        self.size = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.recycled = 0
+        self.ping_failures = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.teardown_appcontext(self.teardown)
+
+    def _connect(self):
+        with self.cond:
+            self.connects += 1
+        if self.connect is not None:
+            return self.connect(), time.time()
+        cfg = self.app.config
+        conn = MySQLdb.connect(
+            host=cfg['MYSQL_HOST'],
+            user=cfg['MYSQL_USER'],
+            passwd=cfg['MYSQL_PASSWORD'],
+            db=cfg['MYSQL_DB'],
+            port=cfg.get('MYSQL_PORT', 3306),
+            charset=cfg.get('MYSQL_CHARSET', 'utf8mb4'),
+            cursorclass=MetricsCursor
+        )
+        return conn, time.time()
+
+    def fill(self):
+        while True:
+            with self.cond:
+                if self.size >= self.app.config['DB_POOL_MIN_SIZE']:
+                    return
+                self.size += 1
+            try:
+                entry = self._connect()
+            except Exception:
+                with self.cond:
+                    self.size -= 1
+                raise
+            with self.cond:
+                self.idle.append(entry)
+                self.cond.notify()
+
+    def checkout(self):
+        cfg = self.app.config
+        start = time.perf_counter()
+        deadline = start + cfg['DB_POOL_TIMEOUT']
+        entry = None
+        with self.cond:
+            while True:
+                if self.idle:
+                    entry = self.idle.pop()
+                    break
+                if self.size < cfg['DB_POOL_MAX_SIZE']:
+                    self.size += 1
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout('No database connection available')
+                self.cond.wait(remaining)
+            waited = time.perf_counter() - start
+            self.in_use += 1
+            self.checkouts += 1
+            if waited > 0.001:
+                self.waits += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        try:
+            if entry is not None:
+                conn, created = entry
+                if cfg['DB_POOL_RECYCLE'] and time.time() - created > cfg['DB_POOL_RECYCLE']:
+                    with self.cond:
+                        self.recycled += 1
+                    self._close(conn)
+                    entry = None
+                elif cfg['DB_POOL_PING']:
+                    try:
+                        conn.ping()
+                    except MySQLdb.Error:
+                        with self.cond:
+                            self.ping_failures += 1
+                        self._close(conn)
+                        entry = None
+            if entry is None:
+                entry = self._connect()
+        except Exception:
+            with self.cond:
+                self.size -= 1
+                self.in_use -= 1
+                self.cond.notify()
+            raise
+        return entry
+
+    def checkin(self, entry):
+        conn = entry[0]
+        try:
+            # End any open transaction so the next user gets a fresh snapshot
+            conn.rollback()
+            keep = True
+        except MySQLdb.Error:
+            self._close(conn)
+            keep = False
+        with self.cond:
+            self.in_use -= 1
+            if keep:
+                self.idle.append(entry)
+            else:
+                self.size -= 1
+            self.cond.notify()
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except MySQLdb.Error:
+            pass
+
+    @property
+    def connection(self):
+        entry = g.get('_db_entry')
+        if entry is None:
+            entry = g._db_entry = self.checkout()
+        return entry[0]
+
+    def teardown(self, exc):
+        entry = g.pop('_db_entry', None)
+        if entry is not None:
+            self.checkin(entry)
+
+    def stats(self):
+        with self.cond:
+            max_size = self.app.config['DB_POOL_MAX_SIZE']
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                'max_size': max_size,
+                'saturation': round(self.in_use / max_size, 4) if max_size else 0.0,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds_total': round(self.wait_seconds, 6),
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'recycled': self.recycled,
+                'ping_failures': self.ping_failures
+            }
+
+mysql = MySQLPool(app)
+
+def busy_response(status, message, retry_after=1):
+    fmt = request.args.get('format')
+    if fmt in API_FORMATS:
+        resp = format_response({'error': message}, fmt)
+    else:
+        resp = make_response(f'<h3>{message}</h3><a href="/students">Back</a>')
+    resp.status_code = status
+    resp.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return resp
+
+@app.errorhandler(PoolTimeout)
+def pool_timeout(e):
+    return busy_response(503, 'Database busy, please try again')
 
 # === RESPONSE FORMATTER (API ONLY) ===
+def _xml_item_tag(key):
+    return key[:-1] if key.endswith('s') else 'item'
+
+def _xml_append(parent, tag, val):
+    if isinstance(val, dict):
+        elem = SubElement(parent, tag)
+        for k, v in val.items():
+            _xml_append(elem, k, v)
+    elif isinstance(val, list):
+        elem = SubElement(parent, tag)
+        for item in val:
+            _xml_append(elem, _xml_item_tag(tag), item)
+    else:
+        SubElement(parent, tag).text = '' if val is None else str(val)
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>\n'
+
+# Formats whose errors are reported through format_response instead of HTML
+API_FORMATS = ['json', 'xml', 'csv', 'ndjson', 'columnar']
+# Formats the list endpoint renders through format_response
+LIST_FORMATS = ['json', 'xml', 'columnar']
+
+def want_pretty():
+    return request.args.get('pretty') in ['1', 'true']
+
 def format_response(data, fmt='json'):
+    with phase('serialize'):
+        return _format_response(data, fmt)
+
+def _format_response(data, fmt):
     if fmt.lower() == 'xml':
         root = Element('response')
         if isinstance(data, list):
             for item in data:
-                elem = SubElement(root, 'student')
-                for key, val in item.items():
-                    SubElement(elem, key).text = str(val)
+                _xml_append(root, 'student', item)
         else:
             for key, val in data.items():
-                SubElement(root, key).text = str(val)
-        rough = tostring(root, 'utf-8')
-        reparsed = xml.dom.minidom.parseString(rough)
-        xml_str = reparsed.toprettyxml(indent="  ")
-        resp = make_response(xml_str)
+                _xml_append(root, key, val)
+        if want_pretty():
+            indent(root)
+        resp = make_response(XML_DECLARATION + tostring(root, 'unicode'))
         resp.headers['Content-Type'] = 'application/xml'
         return resp
+    elif fmt.lower() == 'columnar':
+        return jsonify(columnar(data))
     else:
         return jsonify(data)
 
+def columnar(data):
+    # Lists of records become a header plus one array per column; payloads
+    # that are already column-major (see RowMapper.columns) pass through
+    if isinstance(data, dict):
+        return {key: columnar(val) for key, val in data.items()}
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        # records may differ (a failed batch item has no id), so take the
+        # union of their keys in first-seen order
+        names = list(dict.fromkeys(name for record in data for name in record))
+        return {'columns': names, 'data': [[record.get(name) for record in data] for name in names]}
+    return data
+
+# === STREAMING SERIALIZER (API ONLY) ===
+def iter_rows(cur):
+    size = app.config['STREAM_CHUNK_SIZE']
+    while True:
+        rows = cur.fetchmany(size)
+        if not rows:
+            break
+        for row in rows:
+            yield row
+
+def iter_records(cur, statements, fields):
+    for sql, params in statements:
+        cur.execute(sql, params)
+        mapper = RowMapper(cur.description, fields)
+        for row in iter_rows(cur):
+            yield mapper(row)
+
+def ids_statements(ids, columns):
+    size = app.config['STREAM_CHUNK_SIZE']
+    for i in range(0, len(ids), size):
+        chunk = ids[i:i + size]
+        yield f"SELECT {columns} FROM students WHERE id IN (%s) ORDER BY id" % ", ".join(["%s"] * len(chunk)), chunk
+
+STREAM_MIMETYPES = {
+    'json': 'application/json',
+    'xml': 'application/xml',
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'columnar': 'application/json'
+}
+
+def buffered(pieces, size=65536):
+    # Coalesce per-row pieces so the server writes a few large chunks
+    parts, length = [], 0
+    for piece in pieces:
+        parts.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(parts)
+            parts, length = [], 0
+    if parts:
+        yield ''.join(parts)
+
+def serialize_records(records, fmt, fields, pretty=False):
+    if fmt == 'xml':
+        yield XML_DECLARATION + '<response>'
+        for record in records:
+            elem = Element('student')
+            for key, val in record.items():
+                SubElement(elem, key).text = str(val)
+            if pretty:
+                indent(elem, '  ', 1)
+                yield '\n  ' + tostring(elem, 'unicode')
+            else:
+                yield tostring(elem, 'unicode')
+        yield '\n</response>\n' if pretty else '</response>'
+    elif fmt == 'csv':
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for record in records:
+            writer.writerow(record.values())
+            if out.tell() >= 8192:
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+        yield out.getvalue()
+    elif fmt == 'ndjson':
+        for record in records:
+            yield json.dumps(record) + '\n'
+    elif fmt == 'columnar':
+        # Column arrays can't be streamed, so rows go out positionally
+        yield '{"columns": ' + json.dumps(list(fields)) + ', "rows": '
+        sep = '['
+        for record in records:
+            yield sep + json.dumps(list(record.values()))
+            sep = ','
+        yield '[]}' if sep == '[' else ']}'
+    else:
+        sep = '['
+        for record in records:
+            yield sep + json.dumps(record)
+            sep = ','
+        yield '[]' if sep == '[' else ']'
+
+def stream_students(statements, fields, fmt='json', filename=None):
+    pretty = want_pretty()
+
+    def generate():
+        cur = mysql.connection.cursor(MetricsSSCursor)
+        try:
+            records = iter_records(cur, statements, fields)
+            for chunk in buffered(serialize_records(records, fmt, fields, pretty)):
+                yield chunk
+        finally:
+            cur.close()
+
+    resp = Response(stream_with_context(generate()), mimetype=STREAM_MIMETYPES[fmt])
+    if filename:
+        resp.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return resp
+
+# === LRU CACHE ===
+def deep_sizeof(obj):
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(item) for item in obj)
+    return size
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.time():
+                    self.data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, expires=None):
+        with self.lock:
+            self.data[key] = (value, expires)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def footprint(self):
+        with self.lock:
+            return sum(deep_sizeof(key) + deep_sizeof(value) for key, (value, _) in self.data.items())
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# === SEARCH INDEX ===
+# Trigram index over first_name, last_name, email and program. Candidates
+# are verified against the folded field text, so results match the
+# case/accent-insensitive LIKE '%term%' the SQL path runs. The index
+# remembers the change_seq value it is current to and catches up from
+# students.version and the tombstones, so writes made by any worker show up.
+SEARCH_FIELDS = (2, 3, 4, 5)
+
+def fold(text):
+    text = unicodedata.normalize('NFKD', str(text).casefold())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.docs = {}
+        self.grams = defaultdict(set)
+        self.version = 0
+        self.ready = False
+
+    def build(self):
+        with self.lock:
+            self.docs = {}
+            self.grams = defaultdict(set)
+            # read first: anything committed after it is picked up by catch_up
+            self.version = change_version()
+            cur = mysql.connection.cursor(MetricsSSCursor)
+            cur.execute(f"SELECT {STUDENT_SELECT} FROM students")
+            for row in iter_rows(cur):
+                self._add(row)
+            cur.close()
+            self.ready = True
+
+    def _add(self, row):
+        doc = tuple(fold(row[i]) for i in SEARCH_FIELDS)
+        self.docs[row[0]] = doc
+        for field in doc:
+            for gram in trigrams(field):
+                self.grams[gram].add(row[0])
+
+    def _remove(self, id):
+        doc = self.docs.pop(id, None)
+        if doc is None:
+            return
+        for field in doc:
+            for gram in trigrams(field):
+                postings = self.grams.get(gram)
+                if postings is not None:
+                    postings.discard(id)
+                    if not postings:
+                        del self.grams[gram]
+
+    def catch_up(self, version):
+        # Rows written and deleted since self.version, by this or another worker
+        cur = mysql.connection.cursor(MetricsSSCursor)
+        cur.execute(f"SELECT {STUDENT_SELECT} FROM students WHERE version > %s", (self.version,))
+        for row in iter_rows(cur):
+            self._remove(row[0])
+            self._add(row)
+        cur.close()
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT id FROM student_tombstones WHERE version > %s", (self.version,))
+        for (id,) in cur.fetchall():
+            self._remove(id)
+        cur.close()
+        self.version = version
+
+    def search(self, term, version=None):
+        # None means "use the SQL path": LIKE wildcards in the term, or disabled.
+        # version is the caller's change_version(); the index catches up to it
+        if not app.config['SEARCH_INDEX_ENABLED'] or '%' in term or '_' in term or '\\' in term:
+            return None
+        with self.lock:
+            if not self.ready:
+                self.build()
+            elif version is not None and version > self.version:
+                self.catch_up(version)
+            term = fold(term)
+            if len(term) < 3:
+                candidates = self.docs.keys()
+            else:
+                postings = sorted((self.grams.get(g, set()) for g in trigrams(term)), key=len)
+                candidates = set.intersection(*postings) if postings[0] else ()
+            docs = self.docs
+            return sorted(id for id in candidates if any(term in field for field in docs[id]))
+
+search_index = SearchIndex()
+
+# === STATS COUNTERS ===
+# Headcounts per (program, year_level), loaded with one GROUP BY and then
+# adjusted by the change hooks. Programs are grouped case-insensitively to
+# match the column collation.
+class StudentStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.names = {}
+        self.ready = False
+
+    def _query(self):
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT program, year_level, COUNT(*) FROM students GROUP BY program, year_level")
+        counts, names = Counter(), {}
+        for program, year, count in cur.fetchall():
+            key = (fold(program), int(year))
+            counts[key] += count
+            names.setdefault(key[0], program)
+        cur.close()
+        return counts, names
+
+    def build(self):
+        with self.lock:
+            self.counts, self.names = self._query()
+            self.ready = True
+
+    def verify(self):
+        # Compare against the table and rebuild on drift; True if they
+        # matched, None if the counters hadn't been built yet
+        with self.lock:
+            counts, names = self._query()
+            consistent = +self.counts == +counts if self.ready else None
+            self.counts, self.names = counts, names
+            self.ready = True
+            return consistent
+
+    def adjust(self, row, delta):
+        key = (fold(row[5]), int(row[6]))
+        self.counts[key] += delta
+        self.names.setdefault(key[0], row[5])
+
+    def changed(self, old=None, new=None):
+        with self.lock:
+            if not self.ready:
+                return
+            if old is not None:
+                self.adjust(old, -1)
+            if new is not None:
+                self.adjust(new, 1)
+
+    def snapshot(self):
+        if not self.ready:
+            self.build()
+        with self.lock:
+            by_program, by_year = Counter(), Counter()
+            for (program, year), count in self.counts.items():
+                if count > 0:
+                    by_program[program] += count
+                    by_year[year] += count
+            return {
+                'total': sum(by_year.values()),
+                'by_program': [{'program': self.names[p], 'count': by_program[p]}
+                               for p in sorted(by_program, key=lambda p: self.names[p])],
+                'by_year_level': [{'year_level': y, 'count': by_year[y]} for y in sorted(by_year)]
+            }
+
+student_stats = StudentStats()
+
+# === CONDITIONAL GET ===
+# List ETags come from the committed change_seq value, which every write in
+# every worker process bumps, so one primary-key lookup tells whether the
+# table changed. Detail ETags use the row's version column, remembered per
+# id (for ETAG_VERSION_TTL) so a matching If-None-Match is answered without
+# touching the database. Versions come from the same change_seq, so they
+# also order the change feed.
+class Generation:
+    # Writes seen by this process; reported in /metrics and used by
+    # view_student to tell whether a write raced its read
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def bump(self):
+        with self.lock:
+            self.value += 1
+
+generation = Generation()
+row_versions = LRUCache(app.config['ETAG_VERSION_CACHE_SIZE'])
+
+# Search pages keyed by (change version, folded term, fields, args); a write
+# moves the version on, so older entries can no longer be hit and age out.
+search_cache = LRUCache(app.config['SEARCH_CACHE_SIZE'])
+
+def change_version():
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT value FROM change_seq WHERE id = 1")
+    row = cur.fetchone()
+    cur.close()
+    return row[0] if row else 0
+
+def list_etag(version):
+    args = sorted(request.args.items(multi=True))
+    return hashlib.sha1(f'{version}:{request.path}:{args}'.encode()).hexdigest()
+
+def row_etag(id, version, fmt, fields=None):
+    tag = f'{id}-{version}-{fmt}'
+    if fields and fields != STUDENT_COLUMNS:
+        tag += '-' + '.'.join(fields)
+    return tag
+
+def with_etag(resp, tag):
+    resp = make_response(resp)
+    resp.set_etag(tag)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+def not_modified(tag):
+    return with_etag(Response(status=304), tag)
+
+def etag_matches(tag):
+    # Compressed responses carry '<tag>-gzip' / '<tag>-deflate'; those
+    # revalidate the same underlying representation
+    inm = request.if_none_match
+    return inm.contains(tag) or any(inm.contains(f'{tag}-{enc}') for enc in COMPRESSION_ENCODINGS)
+
+# === COMPRESSION ===
+# Negotiated from Accept-Encoding once the view has produced its response.
+# Buffered bodies are compressed in one go when they are large enough;
+# streamed bodies go through an incremental compressor chunk by chunk.
+COMPRESSION_ENCODINGS = ('gzip', 'deflate')
+COMPRESSIBLE_TYPES = ('application/json', 'application/xml', 'application/x-ndjson')
+
+def compressor(encoding, level):
+    # wbits 31 writes a gzip container, 15 the zlib stream HTTP calls deflate
+    return zlib.compressobj(level, zlib.DEFLATED, 31 if encoding == 'gzip' else 15)
+
+def compress_body(data, encoding, level):
+    comp = compressor(encoding, level)
+    return comp.compress(data) + comp.flush()
+
+def compress_stream(chunks, encoding, level):
+    comp = compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = comp.compress(chunk)
+            if data:
+                yield data
+        yield comp.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+@app.after_request
+def compress_response(resp):
+    level = app.config['COMPRESSION_LEVEL']
+    if not level or resp.status_code < 200 or resp.status_code == 204 or request.method == 'HEAD':
+        return resp
+    if 'Content-Encoding' in resp.headers or resp.direct_passthrough:
+        return resp
+    if not (resp.mimetype.startswith('text/') or resp.mimetype in COMPRESSIBLE_TYPES):
+        return resp
+    resp.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(COMPRESSION_ENCODINGS)
+    if encoding is None:
+        return resp
+    tag, weak = resp.get_etag()
+
+    if resp.status_code == 304:
+        # Echo the tag the client revalidated with
+        if tag and request.if_none_match.contains(f'{tag}-{encoding}'):
+            resp.set_etag(f'{tag}-{encoding}', weak)
+        return resp
+    if resp.is_streamed:
+        resp.response = compress_stream(resp.response, encoding, level)
+        resp.headers.pop('Content-Length', None)
+    else:
+        data = resp.get_data()
+        if len(data) < app.config['COMPRESSION_MIN_SIZE']:
+            return resp
+        with phase('compress'):
+            resp.set_data(compress_body(data, encoding, level))
+    resp.headers['Content-Encoding'] = encoding
+    if tag:
+        resp.set_etag(f'{tag}-{encoding}', weak)
+    return resp
+
+# === CHANGE HOOKS ===
+# Called after a write to students has been committed.
+def student_saved(row, old=None):
+    generation.bump()
+    row_versions.pop(row[0])
+    student_stats.changed(old, row)
+
+def student_deleted(row):
+    generation.bump()
+    row_versions.pop(row[0])
+    student_stats.changed(row, None)
+
+# === TEMPLATE REGISTRY ===
+# Every page template is compiled once here instead of on each request.
+# Pages without per-request data are rendered once and served as-is, and
+# list rows are cached as fragments keyed by the row they were built from.
+TEMPLATES = {
+    'register': templates.REGISTER_HTML,
+    'login': templates.LOGIN_HTML,
+    'index': templates.INDEX_HTML,
+    'student_form': templates.STUDENT_FORM_HTML,
+    'student_list': templates.STUDENT_LIST_HTML,
+    'student_item': templates.STUDENT_ITEM_HTML,
+    'student_detail': templates.STUDENT_DETAIL_HTML,
+    'student_edit': templates.STUDENT_EDIT_HTML
+}
+STATIC_PAGES = ['register', 'login', 'index', 'student_form']
+
+compiled_templates = {name: app.jinja_env.from_string(src) for name, src in TEMPLATES.items()}
+static_pages = {name: compiled_templates[name].render() for name in STATIC_PAGES}
+fragment_cache = LRUCache(app.config['FRAGMENT_CACHE_SIZE'])
+
+def render(name, **context):
+    with phase('render'):
+        app.update_template_context(context)
+        return compiled_templates[name].render(context)
+
+def static_page(name):
+    return static_pages[name]
+
+def student_item(student):
+    # The row's values are the fragment's version: any edit produces a new key
+    key = tuple(student.values())
+    html = fragment_cache.get(key)
+    if html is None:
+        with phase('render'):
+            html = Markup(compiled_templates['student_item'].render(s=student))
+        fragment_cache.set(key, html)
+    return html
+
+# === ADMISSION CONTROL ===
+# Checked by token_required once the token is verified. Each user gets a
+# token bucket (RATE_LIMIT_PER_SEC sustained, RATE_LIMIT_BURST at once)
+# and expensive requests share EXPENSIVE_MAX_CONCURRENCY slots per
+# process. Over the limit means an immediate 429/503 with Retry-After,
+# never a queue. Limits are read per call, so config changes apply live.
+class TokenBuckets:
+    def __init__(self, maxsize):
+        self.lock = threading.Lock()
+        self.buckets = LRUCache(maxsize)
+
+    def take(self, key, rate, burst):
+        # 0 when a token was taken, else seconds until one is available
+        with self.lock:
+            now = time.monotonic()
+            tokens, last = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            self.buckets.set(key, (tokens - 1 if tokens >= 1 else tokens, now))
+            return wait
+
+class ConcurrencyLimit:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+
+    def try_acquire(self, limit):
+        with self.lock:
+            if self.active >= limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+rate_limiter = TokenBuckets(app.config['RATE_LIMIT_USERS'])
+expensive_slots = ConcurrencyLimit()
+
+def expensive_request():
+    if request.endpoint == 'export_students':
+        return True
+    if request.endpoint == 'list_students':
+        args = request.args
+        return bool(args.get('search')) or args.get('format') == 'xml' or args.get('stream') in ['1', 'true']
+    return False
+
+def admit(payload):
+    # Once per request, even when one token_required view calls another
+    if g.get('_admitted'):
+        return None
+    g._admitted = True
+    rate = app.config['RATE_LIMIT_PER_SEC']
+    if rate:
+        user = payload.get('user') or request.remote_addr
+        wait = rate_limiter.take(user, rate, app.config['RATE_LIMIT_BURST'])
+        if wait:
+            metrics.admitted('rejected', 'rate_limit')
+            return busy_response(429, 'Too many requests, slow down', wait)
+    limit = app.config['EXPENSIVE_MAX_CONCURRENCY']
+    if limit and expensive_request():
+        if not expensive_slots.try_acquire(limit):
+            metrics.admitted('rejected', 'concurrency')
+            return busy_response(503, 'Server busy, please try again')
+        g._expensive_slot = True
+        metrics.admitted('admitted', 'expensive')
+    else:
+        metrics.admitted('admitted', 'normal')
+    return None
+
+@app.after_request
+def hand_off_expensive_slot(resp):
+    # A streamed body is still running the query, so its slot is held
+    # until the server closes the response rather than freed at teardown
+    if resp.is_streamed and g.pop('_expensive_slot', None):
+        resp.call_on_close(expensive_slots.release)
+    return resp
+
+@app.teardown_request
+def release_expensive_slot(exc):
+    if g.pop('_expensive_slot', None):
+        expensive_slots.release()
+
 # === JWT AUTH DECORATOR ===
+# Verified tokens are cached by digest until their exp claim, so repeat
+# requests with the same session/header token skip the HMAC and JSON parse.
+token_cache = LRUCache(app.config['TOKEN_CACHE_SIZE'])
+
+def token_key(token):
+    if isinstance(token, str):
+        token = token.encode()
+    return hashlib.sha256(token).digest()
+
+def verify_token(token):
+    key = token_key(token)
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+        token_cache.set(key, payload, payload.get('exp'))
+    return payload
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -45,54 +1073,49 @@ def token_required(f):
             token = session['token']
 
         if not token:
-            if request.args.get('format') in ['json', 'xml']:
+            if request.args.get('format') in API_FORMATS:
                 return format_response({'error': 'Token missing'}, request.args.get('format')), 401
             else:
                 return redirect(url_for('login'))
 
         try:
-            jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+            with phase('auth'):
+                g.token_payload = verify_token(token)
         except:
-            if request.args.get('format') in ['json', 'xml']:
+            if request.args.get('format') in API_FORMATS:
                 return format_response({'error': 'Invalid token'}, request.args.get('format')), 401
             else:
                 session.pop('token', None)
                 return redirect(url_for('login'))
+        rejected = admit(g.token_payload)
+        if rejected is not None:
+            return rejected
         return f(*args, **kwargs)
     return decorated
 
+# === METRICS ===
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    lines = metrics.render()
+    for name, value in mysql.stats().items():
+        lines += prom_header(f'db_pool_{name}', 'gauge', f'Connection pool {name}')
+        lines.append(prom_line(f'db_pool_{name}', {}, value))
+    caches = {'token': token_cache, 'fragment': fragment_cache, 'search': search_cache, 'row_version': row_versions}
+    for field in ['size', 'hits', 'misses', 'hit_ratio']:
+        lines += prom_header(f'cache_{field}', 'gauge', f'Cache {field}')
+        for cache_name, cache in caches.items():
+            lines.append(prom_line(f'cache_{field}', {'cache': cache_name}, cache.stats()[field]))
+    lines += prom_header('students_table_generation', 'counter', 'Committed writes to students seen by this process')
+    lines.append(prom_line('students_table_generation', {}, generation.value))
+    lines += prom_header('expensive_requests_in_flight', 'gauge', 'Search/XML/stream/export requests holding a concurrency slot')
+    lines.append(prom_line('expensive_requests_in_flight', {}, expensive_slots.active))
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
 # === REGISTER ===
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'GET':
-        return render_template_string('''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Register • Student Portal</title>
-            <style>
-                body { font-family: Arial, sans-serif; background: #f5f7ff; margin: 0; padding: 0; }
-                .container { max-width: 500px; margin: 60px auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
-                h2 { text-align: center; color: #1E3A8A; margin-bottom: 25px; }
-                input { width: 100%; padding: 12px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; box-sizing: border-box; }
-                button { width: 100%; padding: 12px; background: #1E3A8A; color: white; border: none; border-radius: 5px; font-size: 16px; cursor: pointer; }
-                button:hover { background: #1a3070; }
-                a { display: block; text-align: center; margin-top: 15px; color: #1E3A8A; text-decoration: none; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>🎓 Register</h2>
-                <form method="POST">
-                    <input type="text" name="username" placeholder="Username" required>
-                    <input type="password" name="password" placeholder="Password" required>
-                    <button type="submit">Create Account</button>
-                </form>
-                <a href="/login">← Already have an account?</a>
-            </div>
-        </body>
-        </html>
-        ''')
+        return static_page('register')
 
     username = request.form['username']
     password = request.form['password']
@@ -111,34 +1134,7 @@ def register():
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'GET':
-        return render_template_string('''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Login • Student Portal</title>
-            <style>
-                body { font-family: Arial, sans-serif; background: #f5f7ff; margin: 0; padding: 0; }
-                .container { max-width: 500px; margin: 60px auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
-                h2 { text-align: center; color: #1E3A8A; margin-bottom: 25px; }
-                input { width: 100%; padding: 12px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; box-sizing: border-box; }
-                button { width: 100%; padding: 12px; background: #1E3A8A; color: white; border: none; border-radius: 5px; font-size: 16px; cursor: pointer; }
-                button:hover { background: #1a3070; }
-                a { display: block; text-align: center; margin-top: 15px; color: #1E3A8A; text-decoration: none; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>🎓 Login</h2>
-                <form method="POST">
-                    <input type="text" name="username" placeholder="Username" required>
-                    <input type="password" name="password" placeholder="Password" required>
-                    <button type="submit">Sign In</button>
-                </form>
-                <a href="/register">← Don't have an account?</a>
-            </div>
-        </body>
-        </html>
-        ''')
+        return static_page('login')
 
     username = request.form['username']
     password = request.form['password']
@@ -158,63 +1154,83 @@ def login():
 # === LOGOUT ===
 @app.route('/logout')
 def logout():
-    session.pop('token', None)
+    token = session.pop('token', None)
+    if token:
+        token_cache.pop(token_key(token))
     return redirect(url_for('login'))
 
+# === CACHE STATS ===
+@app.route('/cache/stats', methods=['GET'])
+@token_required
+def cache_stats():
+    return format_response({
+        'token_cache': token_cache.stats(),
+        'fragment_cache': fragment_cache.stats(),
+        'search_cache': dict(search_cache.stats(), bytes=search_cache.footprint())
+    }, request.args.get('format', 'json'))
+
+@app.route('/db/stats', methods=['GET'])
+@token_required
+def db_stats():
+    return format_response({'pool': mysql.stats()}, request.args.get('format', 'json'))
+
+# === STUDENT VALIDATION ===
+STUDENT_FIELDS = ('student_id', 'first_name', 'last_name', 'email', 'program', 'year_level')
+# Column widths from students_db.sql; strict sql_mode rejects longer values
+STUDENT_FIELD_LENGTHS = {'student_id': 20, 'first_name': 100, 'last_name': 100, 'email': 100, 'program': 100}
+
+INSERT_STUDENT_SQL = """
+    INSERT INTO students (student_id, first_name, last_name, email, program, year_level, version)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+UPDATE_STUDENT_SQL = """
+    UPDATE students SET student_id=%s, first_name=%s, last_name=%s, email=%s, program=%s, year_level=%s,
+        version=%s
+    WHERE id=%s
+"""
+
+TOMBSTONE_SQL = "REPLACE INTO student_tombstones (id, student_id, version) VALUES (%s, %s, %s)"
+
+def next_versions(cur, n=1):
+    # Reserves n change versions and returns the first. The change_seq row
+    # stays locked until commit, so versions become visible in order and a
+    # change feed reader can't skip past one still in flight. Call it before
+    # locking any student rows to keep the lock order the same everywhere.
+    cur.execute("UPDATE change_seq SET value = LAST_INSERT_ID(value + %s) WHERE id = 1", (n,))
+    return cur.lastrowid - n + 1
+
+def validate_student(data):
+    values = []
+    for field in STUDENT_FIELDS[:-1]:
+        value = data.get(field)
+        if value is None or str(value) == '':
+            raise ValueError(f'{field} is required')
+        if len(str(value)) > STUDENT_FIELD_LENGTHS[field]:
+            raise ValueError(f'{field} must be at most {STUDENT_FIELD_LENGTHS[field]} characters')
+        values.append(str(value))
+    try:
+        year = int(data.get('year_level'))
+    except (TypeError, ValueError):
+        raise ValueError('year_level must be a number')
+    if year < 1 or year > 4:
+        raise ValueError('year_level must be between 1 and 4')
+    values.append(year)
+    return tuple(values)
+
 # === CREATE STUDENT ===
 @app.route('/students/new', methods=['GET', 'POST'])
 @token_required
 def create_student():
     if request.method == 'GET':
-        return render_template_string('''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Add Student</title>
-            <style>
-                body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
-                .container { max-width: 600px; margin: auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
-                h2 { color: #1E3A8A; margin-bottom: 20px; }
-                input { width: 100%; padding: 10px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; }
-                button { padding: 10px 20px; background: #1E3A8A; color: white; border: none; border-radius: 5px; cursor: pointer; }
-                a { color: #1E3A8A; text-decoration: none; margin-top: 10px; display: inline-block; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>➕ Add New Student</h2>
-                <form method="POST">
-                    <input name="student_id" placeholder="Student ID (e.g., 2021-0001)" required>
-                    <input name="first_name" placeholder="First Name" required>
-                    <input name="last_name" placeholder="Last Name" required>
-                    <input name="email" type="email" placeholder="Email" required>
-                    <input name="program" placeholder="Program" required>
-                    <input name="year_level" type="number" min="1" max="4" placeholder="Year Level (1-4)" required>
-                    <button type="submit">Add Student</button>
-                </form>
-                <a href="/students">← Cancel</a>
-            </div>
-        </body>
-        </html>
-        ''')
+        return static_page('student_form')
 
     cur = mysql.connection.cursor()
     try:
-        year = int(request.form['year_level'])
-        if year < 1 or year > 4:
-            raise ValueError
-        cur.execute("""
-            INSERT INTO students (student_id, first_name, last_name, email, program, year_level)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (
-            request.form['student_id'],
-            request.form['first_name'],
-            request.form['last_name'],
-            request.form['email'],
-            request.form['program'],
-            year
-        ))
+        values = validate_student(request.form)
+        cur.execute(INSERT_STUDENT_SQL, values + (next_versions(cur),))
         mysql.connection.commit()
+        student_saved((cur.lastrowid,) + values)
         cur.close()
         return redirect(url_for('list_students'))
     except Exception as e:
@@ -222,157 +1238,586 @@ def create_student():
         cur.close()
         return '<h3 style="color:red">Error adding student. Check for duplicate ID/email.</h3><a href="/students/new">Try again</a>', 400
 
+# === BULK IMPORT ===
+# CSV (with a header row) or NDJSON, read line by line from the request body
+# and inserted in IMPORT_BATCH_SIZE chunks, one transaction per chunk.
+def upload_lines():
+    first = True
+    for line in request.stream:
+        text = line.decode('utf-8')
+        if first:
+            text = text.lstrip('\ufeff')
+            first = False
+        yield text
+
+def import_rows(kind):
+    if kind == 'csv':
+        reader = csv.DictReader(upload_lines())
+        for data in reader:
+            yield reader.line_num, data, None
+    else:
+        for lineno, line in enumerate(upload_lines(), 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield lineno, None, 'Invalid JSON'
+                continue
+            if not isinstance(data, dict):
+                yield lineno, None, 'Expected a JSON object'
+                continue
+            yield lineno, data, None
+
+def insert_batch(cur, batch, errors):
+    # Inserts (key, values) pairs and returns the ones that went in;
+    # duplicates are reported into errors. Leaves the transaction open.
+    placeholders = ", ".join(["%s"] * len(batch))
+    cur.execute(
+        f"SELECT student_id, email FROM students WHERE student_id IN ({placeholders}) OR email IN ({placeholders})",
+        [values[0] for _, values in batch] + [values[3] for _, values in batch])
+    taken = cur.fetchall()
+    taken_ids = {fold(row[0]) for row in taken}
+    taken_emails = {fold(row[1]) for row in taken}
+
+    ok = []
+    for line, values in batch:
+        if fold(values[0]) in taken_ids:
+            errors.append({'line': line, 'message': 'Duplicate student_id'})
+        elif fold(values[3]) in taken_emails:
+            errors.append({'line': line, 'message': 'Duplicate email'})
+        else:
+            ok.append((line, values))
+    if not ok:
+        return ok
+
+    try:
+        version = next_versions(cur, len(ok))
+        cur.executemany(INSERT_STUDENT_SQL, [values + (version + k,) for k, (_, values) in enumerate(ok)])
+    except (MySQLdb.IntegrityError, MySQLdb.DataError):
+        # Lost a race with another writer, or a value the column rejected;
+        # redo the chunk row by row
+        mysql.connection.rollback()
+        version = next_versions(cur, len(ok))
+        inserted = []
+        for k, (line, values) in enumerate(ok):
+            try:
+                cur.execute(INSERT_STUDENT_SQL, values + (version + k,))
+                inserted.append((line, values))
+            except MySQLdb.IntegrityError:
+                errors.append({'line': line, 'message': 'Duplicate student_id or email'})
+            except MySQLdb.DataError as e:
+                errors.append({'line': line, 'message': f'Invalid value: {e.args[-1]}'})
+        ok = inserted
+    return ok
+
+def inserted_rows(cur, ok):
+    # Re-read by student_id: multi-row inserts don't guarantee consecutive ids
+    if not ok:
+        return []
+    cur.execute(
+        f"SELECT {STUDENT_SELECT} FROM students WHERE student_id IN (%s)" % ", ".join(["%s"] * len(ok)),
+        [values[0] for _, values in ok])
+    return cur.fetchall()
+
+def import_batch(cur, batch, errors):
+    ok = insert_batch(cur, batch, errors)
+    mysql.connection.commit()
+    for row in inserted_rows(cur, ok):
+        student_saved(row)
+    return len(ok)
+
+@app.route('/students/import', methods=['POST'])
+@token_required
+def import_students():
+    fmt = request.args.get('format', 'json')
+    kind = request.args.get('input')
+    if not kind:
+        kind = 'csv' if request.mimetype in ['text/csv', 'application/csv'] else 'ndjson'
+    if kind not in ['csv', 'ndjson']:
+        return format_response({'error': 'input must be csv or ndjson'}, fmt), 400
+
+    batch_size = app.config['IMPORT_BATCH_SIZE']
+    max_errors = app.config['IMPORT_MAX_ERRORS']
+    start = time.perf_counter()
+    total = imported = 0
+    errors = []
+    seen_ids, seen_emails = set(), set()
+    batch = []
+    cur = mysql.connection.cursor()
+    try:
+        for line, data, error in import_rows(kind):
+            total += 1
+            if error is None:
+                try:
+                    values = validate_student(data)
+                except ValueError as e:
+                    error = str(e)
+            if error is None:
+                sid, email = fold(values[0]), fold(values[3])
+                if sid in seen_ids:
+                    error = 'Duplicate student_id in upload'
+                elif email in seen_emails:
+                    error = 'Duplicate email in upload'
+                else:
+                    seen_ids.add(sid)
+                    seen_emails.add(email)
+                    batch.append((line, values))
+            if error is not None:
+                errors.append({'line': line, 'message': error})
+            if len(batch) >= batch_size:
+                imported += import_batch(cur, batch, errors)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        errors.append({'line': total + 1, 'message': f'Unreadable upload: {e}'})
+    try:
+        if batch:
+            imported += import_batch(cur, batch, errors)
+    finally:
+        cur.close()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        'rows': total,
+        'imported': imported,
+        'failed': len(errors),
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(imported / elapsed, 1) if elapsed else 0.0,
+        'errors': errors[:max_errors]
+    }
+    return format_response(report, fmt), (200 if imported or not errors else 400)
+
+# === ROW MAPPING ===
+# Rows handed to the change hooks are always in STUDENT_COLUMNS order;
+# everything that goes on the wire is mapped by column name through
+# RowMapper, so a projected SELECT maps the same way as a full one.
+STUDENT_COLUMNS = ('id',) + STUDENT_FIELDS
+STUDENT_SELECT = ', '.join(STUDENT_COLUMNS)
+
+class RowMapper:
+    def __init__(self, description, fields):
+        names = [col[0] for col in description]
+        self.fields = fields
+        self.pairs = [(field, names.index(field)) for field in fields]
+
+    def __call__(self, row):
+        return {field: row[i] for field, i in self.pairs}
+
+    def columns(self, rows):
+        return {'columns': list(self.fields), 'data': [[row[i] for row in rows] for _, i in self.pairs]}
+
+def parse_fields():
+    fields = []
+    for name in request.args.get('fields', '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in STUDENT_COLUMNS:
+            raise ValueError(f'Unknown field: {name}')
+        if name not in fields:
+            fields.append(name)
+    return tuple(fields) or STUDENT_COLUMNS
+
+def select_list(fields, extra=()):
+    # id is always selected: keyset cursors and ETags are built from it
+    return ', '.join(('id',) + tuple(f for f in fields if f != 'id') + tuple(extra))
+
+# === FILTERS + SORT ===
+# Structured filters and sort keys are whitelisted against STUDENT_COLUMNS
+# and only ever reach SQL as placeholders; the composite indexes in
+# students_db.sql cover the common combinations.
+def build_filters():
+    clauses, params = [], []
+    programs = [p for p in request.args.getlist('program') if p]
+    if len(programs) == 1:
+        clauses.append("program = %s")
+        params.append(programs[0])
+    elif programs:
+        clauses.append("program IN (%s)" % ", ".join(["%s"] * len(programs)))
+        params += programs
+    for name, op in (('year_level', '='), ('year_level_min', '>='), ('year_level_max', '<=')):
+        raw = request.args.get(name)
+        if not raw:
+            continue
+        try:
+            params.append(int(raw))
+        except ValueError:
+            raise ValueError(f'{name} must be a number')
+        clauses.append(f"year_level {op} %s")
+    return clauses, params
+
+class SortSpec:
+    # Sort keys plus id as the tie-breaker, so every ordering is total and
+    # can be paged with a keyset cursor. The tie-breaker follows the last
+    # key's direction so an index scan can serve the whole ORDER BY.
+    def __init__(self, keys=()):
+        keys = list(keys)
+        self.default = not keys or keys == [('id', False)]
+        if 'id' not in [col for col, _ in keys]:
+            keys.append(('id', keys[-1][1] if keys else False))
+        self.keys = keys
+        self.columns = [col for col, _ in keys]
+
+    def order_by(self, reverse=False):
+        return ', '.join(f"{col} {'DESC' if desc != reverse else 'ASC'}" for col, desc in self.keys)
+
+    def seek(self, values, reverse=False):
+        # Rows strictly after `values` in this order (before it if reverse)
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        ops = ['<' if desc != reverse else '>' for _, desc in self.keys]
+        if len(set(ops)) == 1:
+            marks = ", ".join(["%s"] * len(values))
+            return f"({', '.join(self.columns)}) {ops[0]} ({marks})", list(values)
+        clauses, params = [], []
+        for i, col in enumerate(self.columns):
+            parts = [f"{c} = %s" for c in self.columns[:i]] + [f"{col} {ops[i]} %s"]
+            clauses.append("(" + " AND ".join(parts) + ")")
+            params += list(values[:i + 1])
+        return "(" + " OR ".join(clauses) + ")", params
+
+    def cursor(self, row, names):
+        # Plain ids for the default order; otherwise an opaque token
+        if self.default:
+            return row[names.index('id')]
+        values = [row[names.index(col)] for col in self.columns]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def parse_cursor(self, raw):
+        if not raw:
+            return None
+        if self.default:
+            try:
+                return int(raw)
+            except ValueError:
+                raise ValueError('Invalid cursor')
+        try:
+            values = json.loads(base64.urlsafe_b64decode(raw + '=' * (-len(raw) % 4)))
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+        if not isinstance(values, list) or len(values) != len(self.columns):
+            raise ValueError('Invalid cursor')
+        return values
+
+DEFAULT_SORT = SortSpec()
+
+def parse_sort():
+    keys = []
+    for part in request.args.get('sort', '').split(','):
+        # a literal '+' arrives as a space
+        part = part.strip()
+        if not part:
+            continue
+        desc = part.startswith('-')
+        name = part.lstrip('+-')
+        if name not in STUDENT_COLUMNS:
+            raise ValueError(f'Cannot sort by {name}')
+        if name not in [col for col, _ in keys]:
+            keys.append((name, desc))
+    return SortSpec(keys) if keys else DEFAULT_SORT
+
+# === KEYSET PAGINATION ===
+def page_args(sort=DEFAULT_SORT):
+    try:
+        limit = int(request.args.get('limit', app.config['PAGE_SIZE']))
+    except ValueError:
+        raise ValueError('limit must be a number')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    limit = min(limit, app.config['MAX_PAGE_SIZE'])
+    return limit, sort.parse_cursor(request.args.get('cursor')), sort.parse_cursor(request.args.get('before'))
+
+def page_query(where, params, limit, after=None, before=None, columns=STUDENT_SELECT, sort=DEFAULT_SORT):
+    clauses = list(where) if isinstance(where, list) else [where] if where else []
+    params = list(params)
+    reverse = before is not None
+    if reverse or after is not None:
+        cond, seek_params = sort.seek(before if reverse else after, reverse)
+        clauses.append(cond)
+        params += seek_params
+    sql = f"SELECT {columns} FROM students"
+    if clauses:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in clauses)
+    sql += f" ORDER BY {sort.order_by(reverse)} LIMIT %s"
+    params.append(limit + 1)
+    return sql, params
+
+def fetch_page(cur, where, params, limit, after=None, before=None, columns=STUDENT_SELECT, sort=DEFAULT_SORT):
+    cur.execute(*page_query(where, params, limit, after, before, columns, sort))
+    rows = list(cur.fetchall())
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+    names = [col[0] for col in cur.description] if rows else []
+    return page_result(rows, has_more, after, before, lambda row: sort.cursor(row, names))
+
+def fetch_ids_page(cur, ids, limit, after=None, before=None, columns=STUDENT_SELECT):
+    # ids is the sorted candidate list from the search index
+    if before is not None:
+        end = bisect_left(ids, before)
+        window = ids[max(0, end - limit - 1):end]
+        has_more = len(window) > limit
+        window = window[-limit:]
+    else:
+        start = bisect_right(ids, after) if after is not None else 0
+        window = ids[start:start + limit + 1]
+        has_more = len(window) > limit
+        window = window[:limit]
+    rows = []
+    if window:
+        cur.execute(f"SELECT {columns} FROM students WHERE id IN (%s) ORDER BY id" % ", ".join(["%s"] * len(window)), window)
+        rows = list(cur.fetchall())
+    return page_result(rows, has_more, after, before)
+
+def page_result(rows, has_more, after, before, cursor_of=lambda row: row[0]):
+    if before is not None:
+        next_cursor = cursor_of(rows[-1]) if rows else None
+        prev_cursor = cursor_of(rows[0]) if rows and has_more else None
+    else:
+        next_cursor = cursor_of(rows[-1]) if rows and has_more else None
+        prev_cursor = cursor_of(rows[0]) if rows and after is not None else None
+    return rows, next_cursor, prev_cursor
+
 # === READ ALL + SEARCH ===
+def search_clause(search, ids=None):
+    # A manageable candidate set from the index narrows the query by
+    # primary key; otherwise fall back to LIKE
+    if ids is not None and len(ids) <= app.config['SEARCH_INDEX_MAX_IN']:
+        if not ids:
+            return "1 = 0", []
+        return "id IN (%s)" % ", ".join(["%s"] * len(ids)), list(ids)
+    return "first_name LIKE %s OR last_name LIKE %s OR email LIKE %s OR program LIKE %s", [f"%{search}%"] * 4
+
 @app.route('/students', methods=['GET'])
 @token_required
 def list_students():
     search = request.args.get('search', '')
     fmt = request.args.get('format', 'html')
+    try:
+        wanted = parse_ids(request.args['ids']) if 'ids' in request.args else None
+        filters, filter_params = build_filters()
+        sort = parse_sort()
+        limit, after, before = page_args(sort)
+    except ValueError as e:
+        if fmt in LIST_FORMATS:
+            return format_response({'error': str(e)}, fmt), 400
+        return '<h3>Invalid page</h3><a href="/students">Back</a>', 400
+    fields = STUDENT_COLUMNS
+    if fmt in LIST_FORMATS:
+        try:
+            fields = parse_fields()
+        except ValueError as e:
+            return format_response({'error': str(e)}, fmt), 400
+    # sort columns ride along so the next cursor can be built from the last row
+    columns = select_list(fields, [col for col in sort.columns if col not in fields and col != 'id'])
+
+    version = change_version()
+    tag = list_etag(version)
+    if etag_matches(tag):
+        return not_modified(tag)
+    if wanted is not None:
+        return with_etag(multi_get(fmt, wanted, fields), tag)
+
+    stream = fmt in LIST_FORMATS and request.args.get('stream') in ['1', 'true']
+    cache_key = None
+    if search and not stream:
+        args = tuple(sorted(item for item in request.args.items(multi=True) if item[0] != 'search'))
+        cache_key = (version, fold(search), fields, args)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return with_etag(list_response(fmt, *cached, search=search, limit=limit), tag)
+
+    where, params = list(filters), list(filter_params)
+    ids = search_index.search(search, version) if search else None
+    if search and (ids is None or filters or not sort.default):
+        # filters and custom orders are applied in SQL
+        clause, clause_params = search_clause(search, ids)
+        where.append(clause)
+        params += clause_params
+        ids = None
+
+    if stream:
+        if ids is not None:
+            if after is not None:
+                ids = ids[bisect_right(ids, after):]
+            return with_etag(stream_students(ids_statements(ids, columns), fields, fmt), tag)
+        if after is not None:
+            cond, seek_params = sort.seek(after)
+            where.append(cond)
+            params += seek_params
+        sql = f"SELECT {columns} FROM students"
+        if where:
+            sql += " WHERE " + " AND ".join(f"({c})" for c in where)
+        return with_etag(stream_students([(sql + f" ORDER BY {sort.order_by()}", params)], fields, fmt), tag)
 
     cur = mysql.connection.cursor()
-    if search:
-        cur.execute("""
-            SELECT * FROM students
-            WHERE first_name LIKE %s OR last_name LIKE %s OR email LIKE %s OR program LIKE %s
-        """, (f"%{search}%", f"%{search}%", f"%{search}%", f"%{search}%"))
+    if ids is not None:
+        rows, next_cursor, prev_cursor = fetch_ids_page(cur, ids, limit, after, before, columns)
     else:
-        cur.execute("SELECT * FROM students")
-    rows = cur.fetchall()
+        rows, next_cursor, prev_cursor = fetch_page(cur, where, params, limit, after, before, columns, sort)
+    mapper = RowMapper(cur.description, fields) if rows else None
     cur.close()
 
-    students = []
-    for row in rows:
-        students.append({
-            'id': row[0],
-            'student_id': row[1],
-            'first_name': row[2],
-            'last_name': row[3],
-            'email': row[4],
-            'program': row[5],
-            'year_level': row[6]
-        })
+    with phase('serialize'):
+        if fmt == 'columnar':
+            entries = mapper.columns(rows) if rows else {'columns': list(fields), 'data': [[] for _ in fields]}
+        else:
+            entries = [mapper(row) for row in rows]
+    if fmt not in LIST_FORMATS:
+        entries = [student_item(student) for student in entries]
+    if cache_key is not None:
+        search_cache.set(cache_key, (entries, next_cursor, prev_cursor), time.time() + app.config['SEARCH_CACHE_TTL'])
+    return with_etag(list_response(fmt, entries, next_cursor, prev_cursor, search=search, limit=limit), tag)
 
-    if fmt in ['json', 'xml']:
-        return format_response(students, fmt)
-
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Students • Student Portal</title>
-        <style>
-            body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
-            .container { max-width: 900px; margin: auto; background: white; padding: 25px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
-            h2 { color: #1E3A8A; }
-            .controls { margin: 15px 0; text-align: center; }
-            .controls a { margin: 0 10px; color: #1E3A8A; text-decoration: none; }
-            form.inline { display: inline; }
-            form.inline button {
-                background: none;
-                border: none;
-                color: #1E3A8A;
-                text-decoration: underline;
-                cursor: pointer;
-                font-size: 14px;
-                padding: 0;
-                margin: 0 10px 0 0;
-            }
-            form { text-align: center; margin: 20px 0; }
-            input[type="text"] { padding: 8px; width: 300px; border: 1px solid #ccc; border-radius: 5px; }
-            button { padding: 8px 16px; background: #1E3A8A; color: white; border: none; border-radius: 5px; cursor: pointer; }
-            ul { list-style: none; padding: 0; }
-            li { padding: 15px; margin: 10px 0; background: #f9fbff; border-left: 4px solid #1E3A8A; }
-            .nav { margin-top: 20px; text-align: center; }
-            .nav a { margin: 0 10px; color: #1E3A8A; text-decoration: none; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h2>🎓 Student List</h2>
-            <div class="controls">
-                <a href="/students?format=json">[JSON]</a>
-                <a href="/students?format=xml">[XML]</a>
-            </div>
-            <form method="GET">
-                <input type="text" name="search" placeholder="Search by name/email/program" value="{{search}}">
-                <button type="submit">Search</button>
-            </form>
-            <p><a href="/students/new" style="color:#1E3A8A">➕ Add New Student</a></p>
-            <ul>
-            {% for s in students %}
-                <li>
-                    <strong>{{s.student_id}}</strong>: {{s.first_name}} {{s.last_name}}<br>
-                    {{s.program}}, Year {{s.year_level}} • {{s.email}}<br>
-                    <a href="/students/{{s.id}}">View</a> |
-                    <a href="/students/{{s.id}}/edit">Edit</a> |
-                    <form class="inline" method="POST" action="/students/{{s.id}}/delete" onsubmit="return confirm('Delete this student?')">
-                        <button type="submit">Delete</button>
-                    </form>
-                </li>
-            {% endfor %}
-            </ul>
-            <div class="nav">
-                <a href="/">Home</a> | <a href="/logout">Logout</a>
-            </div>
-        </div>
-    </body>
-    </html>
-    ''', students=students, search=search)
+def parse_ids(raw):
+    try:
+        ids = [int(v) for v in raw.split(',') if v.strip()]
+    except ValueError:
+        raise ValueError('ids must be comma-separated numbers')
+    if not ids:
+        raise ValueError('ids must not be empty')
+    if len(ids) > app.config['MAX_PAGE_SIZE']:
+        raise ValueError(f"At most {app.config['MAX_PAGE_SIZE']} ids per request")
+    return list(dict.fromkeys(ids))
+
+def multi_get(fmt, ids, fields):
+    # One IN query for the whole set; results keep the requested order
+    cur = mysql.connection.cursor()
+    cur.execute(f"SELECT {select_list(fields)} FROM students WHERE id IN (%s)" % ", ".join(["%s"] * len(ids)), ids)
+    found = {row[0]: row for row in cur.fetchall()}
+    mapper = RowMapper(cur.description, fields)
+    cur.close()
+    rows = [found[id] for id in ids if id in found]
+    missing = [id for id in ids if id not in found]
+
+    with phase('serialize'):
+        entries = mapper.columns(rows) if fmt == 'columnar' else [mapper(row) for row in rows]
+    if fmt in LIST_FORMATS:
+        return format_response({'students': entries, 'missing': missing}, fmt)
+    return render('student_list', items=[student_item(student) for student in entries], search='',
+                  limit=len(ids), next_cursor=None, prev_cursor=None, query='')
+
+def list_response(fmt, entries, next_cursor, prev_cursor, search='', limit=None):
+    if fmt in LIST_FORMATS:
+        return format_response({'students': entries, 'next_cursor': next_cursor}, fmt)
+    # filters and sort carry over to the prev/next links
+    keep = [(k, v) for k, v in request.args.items(multi=True) if k not in ['cursor', 'before', 'limit', 'search']]
+    return render('student_list', items=entries, search=search, limit=limit, next_cursor=next_cursor,
+                  prev_cursor=prev_cursor, query=urlencode(keep))
+
+# === BULK EXPORT ===
+@app.route('/students/export', methods=['GET'])
+@token_required
+def export_students():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ['csv', 'ndjson', 'columnar']:
+        return format_response({'error': 'format must be csv, ndjson or columnar'}, 'json'), 400
+    try:
+        fields = parse_fields()
+        clauses, params = build_filters()
+        sort = parse_sort()
+    except ValueError as e:
+        return format_response({'error': str(e)}, 'json'), 400
+
+    sql = f"SELECT {select_list(fields)} FROM students"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    filename = 'students.json' if fmt == 'columnar' else f'students.{fmt}'
+    return stream_students([(sql + f" ORDER BY {sort.order_by()}", params)], fields, fmt, filename)
+
+# === STUDENT STATS ===
+@app.route('/students/stats', methods=['GET'])
+@token_required
+def students_stats():
+    fmt = request.args.get('format', 'json')
+    check = request.args.get('check') in ['1', 'true']
+    if check:
+        consistent = student_stats.verify()
+    stats = student_stats.snapshot()
+    if check:
+        stats['consistent'] = consistent
+    return format_response(stats, fmt)
+
+# === CHANGE FEED ===
+# Rows created or updated after `since`, plus tombstones for deleted ones,
+# merged in version order. Clients poll again with the returned
+# high_water_mark, so an up-to-date poll only reads the version indexes.
+@app.route('/students/changes', methods=['GET'])
+@token_required
+def student_changes():
+    fmt = request.args.get('format', 'json')
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', app.config['PAGE_SIZE'])), app.config['MAX_PAGE_SIZE'])
+        if since < 0 or limit < 1:
+            raise ValueError
+    except ValueError:
+        return format_response({'error': 'since and limit must be non-negative numbers'}, fmt), 400
+    try:
+        fields = parse_fields()
+    except ValueError as e:
+        return format_response({'error': str(e)}, fmt), 400
+
+    cur = mysql.connection.cursor()
+    cur.execute(f"SELECT {select_list(fields, ['version'])} FROM students WHERE version > %s ORDER BY version LIMIT %s",
+                (since, limit + 1))
+    mapper = RowMapper(cur.description, fields)
+    changes = [(row[-1], 'upsert', mapper(row)) for row in cur.fetchall()]
+    cur.execute("SELECT id, student_id, version FROM student_tombstones WHERE version > %s ORDER BY version LIMIT %s",
+                (since, limit + 1))
+    changes += [(row[2], 'delete', {'id': row[0], 'student_id': row[1]}) for row in cur.fetchall()]
+    cur.close()
+
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return format_response({
+        'changes': [{'version': version, 'op': op, 'student': student} for version, op, student in changes],
+        'high_water_mark': changes[-1][0] if changes else since,
+        'has_more': has_more
+    }, fmt)
 
 # === VIEW STUDENT ===
 @app.route('/students/<int:id>', methods=['GET'])
 @token_required
 def view_student(id):
+    fmt = request.args.get('format', 'html')
+    fields = STUDENT_COLUMNS
+    if fmt in ['json', 'xml']:
+        try:
+            fields = parse_fields()
+        except ValueError as e:
+            return format_response({'error': str(e)}, fmt), 400
+    version = row_versions.get(id)
+    if version is not None and etag_matches(row_etag(id, version, fmt, fields)):
+        return not_modified(row_etag(id, version, fmt, fields))
+
+    # A write committed after this point may land between the SELECT and
+    # row_versions.set; its pop must not be undone by an older version
+    seen = generation.value
     cur = mysql.connection.cursor()
-    cur.execute("SELECT * FROM students WHERE id = %s", (id,))
+    cur.execute(f"SELECT {select_list(fields, ['version'])} FROM students WHERE id = %s", (id,))
     row = cur.fetchone()
+    mapper = RowMapper(cur.description, fields)
     cur.close()
     if not row:
+        if fmt in ['json', 'xml']:
+            return format_response({'error': 'Student not found'}, fmt), 404
         return '<h3>Student not found</h3><a href="/students">Back</a>', 404
 
-    student = {
-        'id': row[0],
-        'student_id': row[1],
-        'first_name': row[2],
-        'last_name': row[3],
-        'email': row[4],
-        'program': row[5],
-        'year_level': row[6]
-    }
+    version = row[-1]
+    if generation.value == seen:
+        row_versions.set(id, version, time.time() + app.config['ETAG_VERSION_TTL'])
+    tag = row_etag(id, version, fmt, fields)
+    if etag_matches(tag):
+        return not_modified(tag)
 
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Student Details</title>
-        <style>
-            body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
-            .container { max-width: 600px; margin: auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
-            h2 { color: #1E3A8A; }
-            p { margin: 10px 0; }
-            a { display: inline-block; margin: 5px 10px 0 0; padding: 8px 16px; background: #1E3A8A; color: white; text-decoration: none; border-radius: 5px; }
-            form.inline { display: inline; }
-            form.inline button {
-                padding: 8px 16px; background: #d32f2f; color: white; border: none; border-radius: 5px; cursor: pointer;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h2>🎓 {{student.first_name}} {{student.last_name}}</h2>
-            <p><strong>ID:</strong> {{student.student_id}}</p>
-            <p><strong>Email:</strong> {{student.email}}</p>
-            <p><strong>Program:</strong> {{student.program}}</p>
-            <p><strong>Year:</strong> {{student.year_level}}</p>
-            <a href="/students/{{student.id}}/edit">✏️ Edit</a>
-            <form class="inline" method="POST" action="/students/{{student.id}}/delete" onsubmit="return confirm('Are you sure?')">
-                <button type="submit">🗑️ Delete</button>
-            </form>
-            <a href="/students">← Back</a>
-        </div>
-    </body>
-    </html>
-    ''', student=student)
+    student = mapper(row)
+    if fmt in ['json', 'xml']:
+        return with_etag(format_response(student, fmt), tag)
+    return with_etag(render('student_detail', student=student), tag)
 
 # === EDIT STUDENT ===
 @app.route('/students/<int:id>/edit', methods=['GET', 'POST'])
@@ -380,70 +1825,28 @@ def view_student(id):
 def edit_student(id):
     if request.method == 'GET':
         cur = mysql.connection.cursor()
-        cur.execute("SELECT * FROM students WHERE id = %s", (id,))
+        cur.execute(f"SELECT {STUDENT_SELECT} FROM students WHERE id = %s", (id,))
         row = cur.fetchone()
+        mapper = RowMapper(cur.description, STUDENT_COLUMNS)
         cur.close()
         if not row:
             return '<h3>Not found</h3><a href="/students">Back</a>', 404
-        s = {
-            'id': row[0],
-            'student_id': row[1],
-            'first_name': row[2],
-            'last_name': row[3],
-            'email': row[4],
-            'program': row[5],
-            'year_level': row[6]
-        }
-        return render_template_string('''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Edit Student</title>
-            <style>
-                body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
-                .container { max-width: 600px; margin: auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
-                h2 { color: #1E3A8A; margin-bottom: 20px; }
-                input { width: 100%; padding: 10px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; }
-                button { padding: 10px 20px; background: #1E3A8A; color: white; border: none; border-radius: 5px; cursor: pointer; }
-                a { color: #1E3A8A; text-decoration: none; margin-top: 10px; display: inline-block; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>✏️ Edit Student</h2>
-                <form method="POST" action="/students/{{s.id}}/update">
-                    <input name="student_id" value="{{s.student_id}}" required>
-                    <input name="first_name" value="{{s.first_name}}" required>
-                    <input name="last_name" value="{{s.last_name}}" required>
-                    <input name="email" type="email" value="{{s.email}}" required>
-                    <input name="program" value="{{s.program}}" required>
-                    <input name="year_level" type="number" min="1" max="4" value="{{s.year_level}}" required>
-                    <button type="submit">Save Changes</button>
-                </form>
-                <a href="/students/{{s.id}}">← Cancel</a>
-            </div>
-        </body>
-        </html>
-        ''', s=s)
+        s = mapper(row)
+        return render('student_edit', s=s)
 
     cur = mysql.connection.cursor()
     try:
-        year = int(request.form['year_level'])
-        if year < 1 or year > 4:
-            raise ValueError
-        cur.execute("""
-            UPDATE students SET student_id=%s, first_name=%s, last_name=%s, email=%s, program=%s, year_level=%s
-            WHERE id=%s
-        """, (
-            request.form['student_id'],
-            request.form['first_name'],
-            request.form['last_name'],
-            request.form['email'],
-            request.form['program'],
-            year,
-            id
-        ))
+        values = validate_student(request.form)
+        version = next_versions(cur)
+        cur.execute(f"SELECT {STUDENT_SELECT} FROM students WHERE id = %s FOR UPDATE", (id,))
+        old = cur.fetchone()
+        if not old:
+            mysql.connection.rollback()
+            cur.close()
+            return '<h3>Not found</h3><a href="/students">Back</a>', 404
+        cur.execute(UPDATE_STUDENT_SQL, values + (version, id))
         mysql.connection.commit()
+        student_saved((id,) + values, old)
         cur.close()
         return redirect(url_for('view_student', id=id))
     except:
@@ -455,12 +1858,17 @@ def edit_student(id):
 @token_required
 def delete_student(id):
     cur = mysql.connection.cursor()
-    cur.execute("SELECT * FROM students WHERE id = %s", (id,))
-    if not cur.fetchone():
+    version = next_versions(cur)
+    cur.execute(f"SELECT {STUDENT_SELECT} FROM students WHERE id = %s FOR UPDATE", (id,))
+    row = cur.fetchone()
+    if not row:
+        mysql.connection.rollback()
         cur.close()
         return '<h3>Student not found</h3><a href="/students">Back</a>', 404
     cur.execute("DELETE FROM students WHERE id = %s", (id,))
+    cur.execute(TOMBSTONE_SQL, (id, row[1], version))
     mysql.connection.commit()
+    student_deleted(row)
     cur.close()
     return redirect(url_for('list_students'))
 
@@ -468,7 +1876,125 @@ def delete_student(id):
 @app.route('/students/<int:id>/update', methods=['POST'])
 @token_required
 def update_student_route(id):
-    return edit_student(id)
+    # the token is already checked and admitted
+    return edit_student.__wrapped__(id)
+
+# === BATCH MUTATIONS ===
+# POST /students/batch takes {"operations": [...]} (or a bare list) of
+#   {"op": "create", <fields>}, {"op": "update", "id": n, <fields>}, {"op": "delete", "id": n}
+# and applies them in one transaction, grouped by kind. Every item gets its
+# own status in the report.
+def batch_result(i, op, status, id=None, error=None):
+    result = {'index': i, 'op': op, 'status': status}
+    if id is not None:
+        result['id'] = id
+    if error is not None:
+        result['error'] = error
+    return result
+
+def parse_operations(ops, results):
+    creates, updates, deletes = [], [], []
+    touched = set()
+    for i, op in enumerate(ops):
+        kind = op.get('op') if isinstance(op, dict) else None
+        try:
+            if kind not in ['create', 'update', 'delete']:
+                raise ValueError('op must be create, update or delete')
+            if kind == 'create':
+                creates.append((i, validate_student(op)))
+                continue
+            try:
+                id = int(op.get('id'))
+            except (TypeError, ValueError):
+                raise ValueError('id must be a number')
+            if id in touched:
+                raise ValueError('id appears more than once in the batch')
+            touched.add(id)
+            if kind == 'update':
+                updates.append((i, id, validate_student(op)))
+            else:
+                deletes.append((i, id))
+        except ValueError as e:
+            results[i] = batch_result(i, kind, 400, error=str(e))
+    return creates, updates, deletes
+
+def apply_batch(cur, creates, updates, deletes, results):
+    # Creates go first: insert_batch may roll back to retry row by row,
+    # which must not undo or unlock anything else in the transaction
+    errors = []
+    ok = insert_batch(cur, creates, errors) if creates else []
+    for error in errors:
+        status = 409 if error['message'].startswith('Duplicate') else 400
+        results[error['line']] = batch_result(error['line'], 'create', status, error=error['message'])
+    created = inserted_rows(cur, ok)
+    new_ids = {fold(row[1]): row[0] for row in created}
+    for i, values in ok:
+        results[i] = batch_result(i, 'create', 201, new_ids[fold(values[0])])
+    saved = [(row, None) for row in created]
+
+    # One locked read for every row being changed; the change hooks need the old values
+    ids = [id for _, id, _ in updates] + [id for _, id in deletes]
+    old = {}
+    if ids:
+        version = next_versions(cur, len(ids))
+        versions = dict(zip(ids, range(version, version + len(ids))))
+        cur.execute(f"SELECT {STUDENT_SELECT} FROM students WHERE id IN (%s) FOR UPDATE" % ", ".join(["%s"] * len(ids)), ids)
+        old = {row[0]: row for row in cur.fetchall()}
+
+    for i, id, values in updates:
+        try:
+            cur.execute(UPDATE_STUDENT_SQL, values + (versions[id], id))
+        except MySQLdb.IntegrityError:
+            results[i] = batch_result(i, 'update', 409, id, 'Duplicate student_id or email')
+            continue
+        except MySQLdb.DataError as e:
+            results[i] = batch_result(i, 'update', 400, id, f'Invalid value: {e.args[-1]}')
+            continue
+        # version always changes, so an existing row always counts as affected
+        if cur.rowcount:
+            results[i] = batch_result(i, 'update', 200, id)
+            saved.append(((id,) + values, old.get(id)))
+        else:
+            results[i] = batch_result(i, 'update', 404, id, 'Student not found')
+
+    deleted = [old[id] for _, id in deletes if id in old]
+    if deleted:
+        cur.execute("DELETE FROM students WHERE id IN (%s)" % ", ".join(["%s"] * len(deleted)), [row[0] for row in deleted])
+        cur.executemany(TOMBSTONE_SQL, [(row[0], row[1], versions[row[0]]) for row in deleted])
+    for i, id in deletes:
+        if id in old:
+            results[i] = batch_result(i, 'delete', 200, id)
+        else:
+            results[i] = batch_result(i, 'delete', 404, id, 'Student not found')
+    mysql.connection.commit()
+
+    for row, prev in saved:
+        student_saved(row, prev)
+    for row in deleted:
+        student_deleted(row)
+
+@app.route('/students/batch', methods=['POST'])
+@token_required
+def batch_students():
+    fmt = request.args.get('format', 'json')
+    body = request.get_json(silent=True)
+    ops = body.get('operations') if isinstance(body, dict) else body
+    if not isinstance(ops, list) or not ops:
+        return format_response({'error': 'Expected a JSON list of operations'}, fmt), 400
+    if len(ops) > app.config['BATCH_MAX_ITEMS']:
+        return format_response({'error': f"At most {app.config['BATCH_MAX_ITEMS']} operations per batch"}, fmt), 400
+
+    results = [None] * len(ops)
+    creates, updates, deletes = parse_operations(ops, results)
+    cur = mysql.connection.cursor()
+    try:
+        apply_batch(cur, creates, updates, deletes, results)
+    finally:
+        cur.close()
+
+    failed = sum(1 for result in results if result['status'] >= 400)
+    report = {'results': results, 'succeeded': len(results) - failed, 'failed': failed}
+    return format_response(report, fmt), (200 if failed < len(results) else 400)
 
 # === HOME ===
 @app.route('/')
@@ -476,28 +2002,12 @@ def index():
     if 'token' in session:
         return redirect(url_for('list_students'))
     else:
-        return render_template_string('''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Student Portal</title>
-            <style>
-                body { font-family: Arial, sans-serif; background: #f5f7ff; display: flex; justify-content: center; align-items: center; height: 100vh; margin: 0; }
-                .box { text-align: center; background: white; padding: 40px; border-radius: 15px; box-shadow: 0 0 30px rgba(0,0,0,0.15); }
-                h1 { color: #1E3A8A; margin-bottom: 30px; }
-                .btn { display: block; width: 200px; margin: 12px auto; padding: 12px; background: #1E3A8A; color: white; text-decoration: none; border-radius: 8px; }
-                .btn:hover { background: #1a3070; }
-            </style>
-        </head>
-        <body>
-            <div class="box">
-                <h1>🎓 Student Management Portal</h1>
-                <a href="/login" class="btn">Login</a>
-                <a href="/register" class="btn">Register</a>
-            </div>
-        </body>
-        </html>
-        ''')
+        return static_page('index')
 
 if __name__ == '__main__':
+    mysql.fill()
+    with app.app_context():
+        student_stats.build()
+        if app.config['SEARCH_INDEX_ENABLED']:
+            search_index.build()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,151 @@
+# Shared helpers for the benchmark scripts. They run against a scratch
+# database (BENCH_DB) on the MySQL server configured in config.Config and
+# never touch MYSQL_DB.
+import datetime
+import json
+import math
+import os
+import random
+import re
+import time
+
+import MySQLdb
+
+from config import Config
+
+BENCH_DB = os.environ.get('BENCH_DB', 'students_bench')
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'students_db.sql')
+
+FIRST_NAMES = ['Juan', 'Maria', 'Pedro', 'Ana', 'Luis', 'Sofia', 'Carlos', 'Isabel', 'Miguel', 'Elena',
+               'Rafael', 'Carmen', 'Diego', 'Lucia', 'Gabriel', 'Teresa', 'Rosa', 'Antonio', 'Luna', 'Victor']
+LAST_NAMES = ['Dela Cruz', 'Santos', 'Gomez', 'Reyes', 'Aquino', 'Lim', 'Tan', 'Ong', 'Chua', 'Wong',
+              'Sy', 'Yu', 'Cheng', 'Huang', 'Lin', 'Chen', 'Lo', 'Ng', 'Ko', 'Fei', 'Ma', 'Garcia', 'Cruz']
+PROGRAMS = ['Computer Science', 'Information Technology', 'Computer Engineering', 'Data Science',
+            'Cybersecurity', 'Software Engineering', 'AI & Machine Learning', 'Information Systems']
+
+
+def connect(db=BENCH_DB):
+    kwargs = dict(host=Config.MYSQL_HOST, user=Config.MYSQL_USER, passwd=Config.MYSQL_PASSWORD, charset='utf8mb4')
+    if db:
+        kwargs['db'] = db
+    return MySQLdb.connect(**kwargs)
+
+
+def statements():
+    sql = open(SCHEMA).read()
+    sql = re.sub(r'--[^\n]*', '', sql)
+    for stmt in sql.split(';'):
+        stmt = stmt.strip()
+        if stmt and not re.match(r'(CREATE DATABASE|USE|INSERT INTO students)\b', stmt, re.I):
+            yield stmt
+
+
+def schema_statements():
+    return [stmt for stmt in statements() if not re.match(r'UPDATE\b', stmt, re.I)]
+
+
+def backfill_statements():
+    # The schema's data fixes (row versions, change_seq); they only mean
+    # something once the rows are in
+    return [stmt for stmt in statements() if re.match(r'UPDATE\b', stmt, re.I)]
+
+
+def synthetic_students(n, start=0, seed=42):
+    rnd = random.Random(seed + start)
+    for i in range(start, start + n):
+        first = rnd.choice(FIRST_NAMES)
+        last = rnd.choice(LAST_NAMES)
+        yield (
+            f'B{i:08d}',
+            first,
+            last,
+            f'{first.lower()}.{i}@university.edu',
+            rnd.choice(PROGRAMS),
+            rnd.randint(1, 4),
+        )
+
+
+def seed_database(n, batch=5000):
+    conn = connect(None)
+    cur = conn.cursor()
+    cur.execute(f'DROP DATABASE IF EXISTS `{BENCH_DB}`')
+    cur.execute(f'CREATE DATABASE `{BENCH_DB}`')
+    cur.execute(f'USE `{BENCH_DB}`')
+    for stmt in schema_statements():
+        cur.execute(stmt)
+    rows = []
+    for row in synthetic_students(n):
+        rows.append(row)
+        if len(rows) == batch:
+            insert_students(cur, rows)
+            conn.commit()
+            rows = []
+    if rows:
+        insert_students(cur, rows)
+        conn.commit()
+    for stmt in backfill_statements():
+        cur.execute(stmt)
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def insert_students(cur, rows):
+    cur.executemany(
+        "INSERT INTO students (student_id, first_name, last_name, email, program, year_level) "
+        "VALUES (%s, %s, %s, %s, %s, %s)", rows)
+
+
+def bench_app():
+    # Import lazily so config overrides land before the app reads them
+    from app import app
+    app.config['MYSQL_DB'] = BENCH_DB
+    app.config['TESTING'] = True
+    # Measure the handlers, not admission control: one bench user under load would be throttled
+    app.config['RATE_LIMIT_PER_SEC'] = 0
+    app.config['EXPENSIVE_MAX_CONCURRENCY'] = 0
+    return app
+
+
+def api_token(app, user='bench'):
+    import jwt
+    exp = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    return jwt.encode({'user': user, 'exp': exp}, app.config['SECRET_KEY'], algorithm='HS256')
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def summarize(samples):
+    return {
+        'n': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def dump(results, path=None):
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+def sizes_arg(value):
+    return [int(v) for v in value.split(',') if v]
@@ -0,0 +1,66 @@
+# Bytes on the wire and CPU cost per compression level for the payloads
+# that dominate traffic: the roster as JSON, pretty XML and the HTML list,
+# plus the streamed JSON export path. Needs no database; rows are synthetic.
+#
+#   python -m benchmarks.compression --rows 500,5000 --levels 1,6,9
+import argparse
+import time
+
+from benchmarks.common import bench_app, dump, sizes_arg, synthetic_students
+
+
+def cpu_ms(fn, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return (time.process_time() - start) * 1000 / repeat, result
+
+
+def payloads(rows):
+    from app import (STUDENT_COLUMNS, buffered, format_response, render, serialize_records,
+                     student_item)
+
+    students = [dict(zip(STUDENT_COLUMNS, (i + 1,) + row)) for i, row in enumerate(synthetic_students(rows))]
+    envelope = {'students': students, 'next_cursor': None}
+    return {
+        'json': format_response(envelope, 'json').get_data(),
+        'xml_pretty': format_response(envelope, 'xml').get_data(),
+        'html': render('student_list', items=[student_item(s) for s in students], search='', limit=rows,
+                       next_cursor=None, prev_cursor=None).encode(),
+        'json_stream': [chunk.encode() for chunk in buffered(serialize_records(students, 'json', STUDENT_COLUMNS))],
+    }
+
+
+def run(rows, levels, encoding, repeat):
+    app = bench_app()
+    from app import compress_body, compress_stream
+
+    results = {}
+    with app.test_request_context('/students?pretty=1'):
+        for name, body in payloads(rows).items():
+            streamed = isinstance(body, list)
+            size = sum(map(len, body)) if streamed else len(body)
+            entry = {'identity_bytes': size}
+            for level in levels:
+                if streamed:
+                    ms, out = cpu_ms(lambda: b''.join(compress_stream(iter(body), encoding, level)), repeat)
+                else:
+                    ms, out = cpu_ms(lambda: compress_body(body, encoding, level), repeat)
+                entry[f'level_{level}'] = {'bytes': len(out), 'ratio': round(size / len(out), 2), 'cpu_ms': round(ms, 3)}
+            results[name] = entry
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=sizes_arg, default=[500, 5000])
+    parser.add_argument('--levels', type=sizes_arg, default=list(range(1, 10)))
+    parser.add_argument('--encoding', choices=['gzip', 'deflate'], default='gzip')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+    dump({str(rows): run(rows, args.levels, args.encoding, args.repeat) for rows in args.rows}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# Query plan check for the list filters and sort keys: every combination in
+# CASES must be served by an index, with no full scan, no full index scan
+# under a WHERE clause and no filesort. Exits non-zero on a bad plan, so it
+# can gate schema or query changes. KNOWN_UNINDEXED combinations are
+# planned and reported too, but do not fail the run.
+#
+#   python -m benchmarks.explain --size 100000
+import argparse
+import sys
+
+from benchmarks.common import bench_app, connect, dump, seed_database
+
+CASES = [
+    'program=Computer+Science&year_level=4&sort=last_name',
+    'program=Computer+Science&sort=last_name',
+    'program=Computer+Science&year_level=4',
+    'program=Computer+Science&sort=-year_level',
+    'year_level=4&sort=last_name',
+    'sort=last_name',
+    'sort=-last_name',
+    'sort=last_name,-year_level',
+    'year_level_min=2&year_level_max=3&sort=year_level',
+    'program=Computer+Science&year_level_min=3&sort=-year_level',
+]
+
+# A year range followed by an order on another column cannot use one index
+# for both; MySQL either filesorts the range or walks the sort index and
+# filters. Kept visible here rather than adding an index per combination.
+KNOWN_UNINDEXED = [
+    'year_level_min=2&year_level_max=3&sort=last_name',
+    'year_level_min=2&year_level_max=3',
+    'program=Computer+Science&year_level_min=3&sort=last_name',
+]
+
+
+def plan(cur, sql, params):
+    cur.execute('EXPLAIN ' + sql, params)
+    names = [col[0] for col in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+def problems(rows, filtered):
+    # With a WHERE clause a full index scan means the filter is applied row by
+    # row while walking the sort index, which is a full scan in disguise
+    found = []
+    for row in rows:
+        if row.get('type') == 'ALL':
+            found.append('full scan')
+        if filtered and row.get('type') == 'index':
+            found.append('full index scan')
+        if 'filesort' in (row.get('Extra') or ''):
+            found.append('filesort')
+    return found
+
+
+def run(limit):
+    app = bench_app()
+    from app import build_filters, page_query, parse_sort
+
+    conn = connect()
+    cur = conn.cursor()
+    results = {}
+    for query in CASES + KNOWN_UNINDEXED:
+        with app.test_request_context('/students?' + query):
+            where, params = build_filters()
+            sort = parse_sort()
+            first = page_query(where, params, limit, sort=sort)
+            cur.execute(first[0], first[1])
+            rows = cur.fetchall()[:limit]
+            second = None
+            if rows:
+                # Second page: same plan, with the keyset seek condition added.
+                # A short first page still has a last row to seek from
+                names = [col[0] for col in cur.description]
+                after = sort.parse_cursor(str(sort.cursor(rows[-1], names)))
+                second = page_query(where, params, limit, after=after, sort=sort)
+        pages = {'first': plan(cur, *first)}
+        found = problems(pages['first'], bool(where))
+        if second is not None:
+            # the next page always carries the seek condition
+            pages['next'] = plan(cur, *second)
+            found += problems(pages['next'], True)
+        results[query] = {
+            'problems': sorted(set(found)),
+            'known': query in KNOWN_UNINDEXED,
+            'plans': pages,
+        }
+    cur.close()
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--no-seed', action='store_true', help='reuse the existing bench database')
+    parser.add_argument('--out')
+    args = parser.parse_args()
+    if not args.no_seed:
+        seed_database(args.size)
+    results = run(args.limit)
+    dump(results, args.out)
+    failed = [query for query, result in results.items() if result['problems'] and not result['known']]
+    for query in failed:
+        print(f'FAIL {query}: {", ".join(results[query]["problems"])}', file=sys.stderr)
+    for query in KNOWN_UNINDEXED:
+        if results[query]['problems']:
+            print(f'KNOWN {query}: {", ".join(results[query]["problems"])}', file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Bulk import throughput (rows/sec) through POST /students/import for a
+# range of batch sizes.
+#
+#   python -m benchmarks.import_rows --rows 20000 --batch-sizes 1,100,500,2000
+import argparse
+import csv
+import io
+import json
+import time
+
+from benchmarks.common import bench_app, api_token, dump, seed_database, sizes_arg, synthetic_students
+
+FIELDS = ['student_id', 'first_name', 'last_name', 'email', 'program', 'year_level']
+
+
+def csv_payload(rows):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(FIELDS)
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+
+def ndjson_payload(rows):
+    return ''.join(json.dumps(dict(zip(FIELDS, row))) + '\n' for row in rows).encode()
+
+
+def run(n, batch_size, kind):
+    seed_database(0)
+    app = bench_app()
+    app.config['IMPORT_BATCH_SIZE'] = batch_size
+    rows = list(synthetic_students(n, start=10000000))
+    body = csv_payload(rows) if kind == 'csv' else ndjson_payload(rows)
+    client = app.test_client()
+    start = time.perf_counter()
+    resp = client.post('/students/import?input=' + kind, data=body, headers={'x-access-token': api_token(app)})
+    elapsed = time.perf_counter() - start
+    report = resp.get_json()
+    return {
+        'status': resp.status_code,
+        'imported': report['imported'],
+        'failed': report['failed'],
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(report['imported'] / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-sizes', type=sizes_arg, default=[1, 100, 500, 2000])
+    parser.add_argument('--input', choices=['csv', 'ndjson'], default='csv')
+    parser.add_argument('--out')
+    args = parser.parse_args()
+    dump({str(size): run(args.rows, size, args.input) for size in args.batch_sizes}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# HTML render cost per request: render_template_string (compile on every
+# call, as the views used to do) vs the precompiled template registry.
+# Needs no database; rows are synthetic.
+#
+#   python -m benchmarks.render --rows 50,500
+import argparse
+
+from flask import render_template_string
+
+from benchmarks.common import bench_app, dump, sizes_arg, summarize, synthetic_students, timed
+
+
+def run(rows, repeat):
+    app = bench_app()
+    import templates
+    from app import STATIC_PAGES, STUDENT_COLUMNS, TEMPLATES, render, static_page, student_item
+
+    students = [dict(zip(STUDENT_COLUMNS, (i + 1,) + row)) for i, row in enumerate(synthetic_students(rows))]
+    list_context = dict(search='', limit=rows, next_cursor=None, prev_cursor=None)
+    legacy_list = templates.STUDENT_LIST_HTML.replace(
+        '{% for item in items %}{{ item }}{% endfor %}',
+        '{% for s in students %}' + templates.STUDENT_ITEM_HTML + '{% endfor %}')
+
+    results = {}
+    with app.test_request_context('/students'):
+        for name in STATIC_PAGES:
+            results[name] = {
+                'before': summarize(timed(lambda: render_template_string(TEMPLATES[name]), repeat)),
+                'after': summarize(timed(lambda: static_page(name), repeat)),
+            }
+        results['student_detail'] = {
+            'before': summarize(timed(lambda: render_template_string(TEMPLATES['student_detail'], student=students[0]), repeat)),
+            'after': summarize(timed(lambda: render('student_detail', student=students[0]), repeat)),
+        }
+        results['student_list'] = {
+            'before': summarize(timed(lambda: render_template_string(legacy_list, students=students, **list_context), repeat)),
+            'after': summarize(timed(lambda: render('student_list', items=[student_item(student) for student in students], **list_context), repeat)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=sizes_arg, default=[50, 500])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+    dump({str(rows): run(rows, args.repeat) for rows in args.rows}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+# Route benchmark suite. Seeds the scratch database with a synthetic roster,
+# then drives every route/format through the Flask test client (one request
+# at a time) and through a concurrent HTTP load generator. Results are
+# written as JSON and can be checked against a saved baseline.
+#
+#   python -m benchmarks.routes --sizes 1000,100000 --out bench.json
+#   python -m benchmarks.routes --sizes 1000 --baseline bench.json
+#   python -m benchmarks.routes --sizes 1000 --url http://127.0.0.1:8000 --no-seed
+#
+# A scenario's path and body may be callables of a per-scenario request
+# counter, so write scenarios send fresh rows every time. Deletes consume
+# rows inserted up front (--victims); once those run out they hit 404s.
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.common import api_token, bench_app, connect, dump, insert_students, seed_database, sizes_arg, summarize
+
+# Keeps rows written by this run unique when the database is reused (--no-seed)
+RUN = os.urandom(3).hex()
+
+
+def new_student(tag, n):
+    return dict(student_id=f'{tag}{RUN}{n:08d}', first_name='Bench', last_name='Writer',
+                email=f'{tag.lower()}.{RUN}.{n}@university.edu', program='Benchmark', year_level=2)
+
+
+def batch_body(mid):
+    # 10 creates and 10 updates of existing rows per request
+    def body(n):
+        ops = [dict(new_student('C', n * 10 + k), op='create') for k in range(10)]
+        ops += [dict(new_student('U', n * 10 + k), op='update', id=mid + k) for k in range(10)]
+        return json.dumps({'operations': ops}), 'application/json'
+    return body
+
+
+def import_body(n):
+    rows = (json.dumps(new_student('I', n * 100 + k)) for k in range(100))
+    return '\n'.join(rows) + '\n', 'application/x-ndjson'
+
+
+def add_victims(count):
+    # Rows for the delete scenario, inserted straight into the table
+    rows = [(f'D{RUN}{i:08d}', 'Delete', 'Me', f'd.{RUN}.{i}@university.edu', 'Benchmark', 1) for i in range(count)]
+    conn = connect()
+    cur = conn.cursor()
+    for i in range(0, count, 5000):
+        insert_students(cur, rows[i:i + 5000])
+    conn.commit()
+    cur.execute("SELECT id FROM students WHERE student_id LIKE %s ORDER BY id", (f'D{RUN}%',))
+    ids = [row[0] for row in cur.fetchall()]
+    cur.close()
+    conn.close()
+    return ids
+
+
+def scenarios(size, victims=iter(())):
+    mid = max(1, size // 2)
+    update = dict(student_id=f'B{mid - 1:08d}', first_name='Bench', last_name='Mark',
+                  email=f'bench.{mid}@university.edu', program='Computer Science', year_level='2')
+    return [
+        ('index', 'GET', '/', None),
+        ('login_page', 'GET', '/login', None),
+        ('new_form', 'GET', '/students/new', None),
+        ('list_html', 'GET', '/students', None),
+        ('list_json', 'GET', '/students?format=json', None),
+        ('list_xml', 'GET', '/students?format=xml', None),
+        ('list_xml_pretty', 'GET', '/students?format=xml&pretty=1', None),
+        ('list_page_500_json', 'GET', '/students?format=json&limit=500', None),
+        ('list_page_500_columnar', 'GET', '/students?format=columnar&limit=500', None),
+        ('list_deep_cursor_json', 'GET', f'/students?format=json&cursor={mid}', None),
+        ('search_html', 'GET', '/students?search=Santos', None),
+        ('search_json', 'GET', '/students?search=Computer%20Science&format=json', None),
+        ('search_xml', 'GET', '/students?search=maria&format=xml', None),
+        ('search_wildcard_json', 'GET', '/students?search=ma_ia&format=json', None),
+        ('stream_json', 'GET', '/students?format=json&stream=1&search=gabriel', None),
+        ('stream_xml', 'GET', '/students?format=xml&stream=1&search=gabriel', None),
+        ('detail_html', 'GET', f'/students/{mid}', None),
+        ('detail_json', 'GET', f'/students/{mid}?format=json', None),
+        ('detail_xml', 'GET', f'/students/{mid}?format=xml', None),
+        ('multi_get_200_json', 'GET', '/students?format=json&ids=' + ','.join(str(mid + i) for i in range(200)), None),
+        ('edit_form', 'GET', f'/students/{mid}/edit', None),
+        ('stats_json', 'GET', '/students/stats?format=json', None),
+        ('stats_xml', 'GET', '/students/stats?format=xml', None),
+        ('export_csv', 'GET', '/students/export?format=csv&program=Cybersecurity&year_level=4', None),
+        ('export_ndjson', 'GET', '/students/export?format=ndjson&program=Cybersecurity&year_level=4', None),
+        ('export_columnar', 'GET', '/students/export?format=columnar&program=Cybersecurity&year_level=4', None),
+        ('changes_first_page_json', 'GET', '/students/changes?format=json&since=0&limit=500', None),
+        ('changes_caught_up_json', 'GET', f'/students/changes?format=json&since={10 ** 12}', None),
+        ('update', 'POST', f'/students/{mid}/update', update),
+        ('create', 'POST', '/students/new', lambda n: new_student('N', n)),
+        ('batch_20_json', 'POST', '/students/batch?format=json', batch_body(mid)),
+        ('import_100_ndjson', 'POST', '/students/import?format=json&input=ndjson', import_body),
+        ('delete', 'POST', lambda n: f'/students/{next(victims, 0)}/delete', None),
+    ]
+
+
+def build_request(path, data, n):
+    path = path(n) if callable(path) else path
+    data = data(n) if callable(data) else data
+    if data is None:
+        return path, None, None
+    if isinstance(data, dict):
+        return path, urlencode(data), 'application/x-www-form-urlencoded'
+    return path, data[0], data[1]
+
+
+def run_micro(app, token, size, repeat, warmup, victims):
+    client = app.test_client()
+    headers = {'x-access-token': token}
+    results = {}
+    for name, method, path, data in scenarios(size, victims):
+        counter = itertools.count()
+        for _ in range(warmup):
+            url, body, ctype = build_request(path, data, next(counter))
+            client.open(url, method=method, data=body, content_type=ctype, headers=headers)
+        samples = []
+        status = None
+        started = time.perf_counter()
+        for _ in range(repeat):
+            url, body, ctype = build_request(path, data, next(counter))
+            start = time.perf_counter()
+            resp = client.open(url, method=method, data=body, content_type=ctype, headers=headers)
+            resp.get_data()
+            samples.append(time.perf_counter() - start)
+            status = resp.status_code
+        elapsed = time.perf_counter() - started
+        results[name] = dict(summarize(samples), status=status, rps=round(repeat / elapsed, 1))
+    return results
+
+
+class Server:
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+def load_worker(base, token, method, path, data, counter, deadline, samples, errors):
+    parts = urlsplit(base)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    while time.perf_counter() < deadline:
+        url, body, ctype = build_request(path, data, next(counter))
+        headers = {'x-access-token': token}
+        if ctype:
+            headers['Content-Type'] = ctype
+        start = time.perf_counter()
+        try:
+            conn.request(method, url, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 500:
+                errors.append(resp.status)
+            if resp.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        except (OSError, http.client.HTTPException):
+            errors.append('io')
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            continue
+        samples.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_load(base, token, size, concurrency, duration, victims):
+    results = {}
+    for name, method, path, data in scenarios(size, victims):
+        samples, errors = [], []
+        counter = itertools.count(10 ** 6)
+        deadline = time.perf_counter() + duration
+        workers = [threading.Thread(target=load_worker, args=(base, token, method, path, data, counter, deadline, samples, errors))
+                   for _ in range(concurrency)]
+        started = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - started
+        results[name] = dict(summarize(samples), errors=len(errors), rps=round(len(samples) / elapsed, 1))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, modes in baseline.get('results', {}).items():
+        for mode, routes in modes.items():
+            for name, base in routes.items():
+                cur = results.get(size, {}).get(mode, {}).get(name)
+                if not cur:
+                    continue
+                if base['p95_ms'] and cur['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                    regressions.append(f"{size}/{mode}/{name}: p95 {base['p95_ms']:.2f} -> {cur['p95_ms']:.2f} ms")
+                if base['rps'] and cur['rps'] < base['rps'] * (1 - tolerance):
+                    regressions.append(f"{size}/{mode}/{name}: rps {base['rps']} -> {cur['rps']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=sizes_arg, default=[1000])
+    parser.add_argument('--repeat', type=int, default=200, help='test-client requests per route')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds of load per route')
+    parser.add_argument('--url', help='load an already running server instead of an in-process one')
+    parser.add_argument('--no-seed', action='store_true', help='reuse the existing scratch database')
+    parser.add_argument('--no-load', action='store_true', help='only run the test-client pass')
+    parser.add_argument('--victims', type=int, default=5000, help='rows inserted up front for the delete scenario')
+    parser.add_argument('--out')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        if not args.no_seed:
+            seed_database(size)
+        victims = iter(add_victims(args.victims))
+        app = bench_app()
+        # Search scenarios repeat the same term; measure the index and LIKE
+        # paths rather than search_cache hits (an external --url server
+        # should be started with SEARCH_CACHE_TTL = 0 as well)
+        app.config['SEARCH_CACHE_TTL'] = 0
+        from app import search_index, student_stats
+        with app.app_context():
+            search_index.build()
+            student_stats.build()
+        token = api_token(app)
+        results[str(size)] = {'micro': run_micro(app, token, size, args.repeat, args.warmup, victims)}
+        if not args.no_load:
+            if args.url:
+                results[str(size)]['load'] = run_load(args.url, token, size, args.concurrency, args.duration, victims)
+            else:
+                with Server(app) as server:
+                    results[str(size)]['load'] = run_load(server.url, token, size, args.concurrency, args.duration, victims)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    dump(report, args.out)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print('REGRESSION', line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
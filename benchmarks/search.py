@@ -0,0 +1,40 @@
+# Search latency against table size: LIKE '%term%' scan vs the trigram index.
+#
+#   python -m benchmarks.search --sizes 1000,10000,100000
+import argparse
+
+from benchmarks.common import bench_app, dump, seed_database, sizes_arg, summarize, timed
+
+TERMS = ['Computer Science', 'santos', 'Cruz', 'maria.1', 'Data', 'gabriel', 'xyzzy']
+
+
+def run(size, repeat):
+    seed_database(size)
+    app = bench_app()
+    from app import search_index, fetch_page, fetch_ids_page, mysql
+
+    results = {}
+    with app.app_context():
+        cur = mysql.connection.cursor()
+        like = "first_name LIKE %s OR last_name LIKE %s OR email LIKE %s OR program LIKE %s"
+        results['build_ms'] = timed(search_index.build, 1)[0] * 1000
+        for term in TERMS:
+            pattern = f'%{term}%'
+            sql_samples = timed(lambda: fetch_page(cur, like, (pattern,) * 4, 50), repeat)
+            index_samples = timed(lambda: fetch_ids_page(cur, search_index.search(term), 50), repeat)
+            results[term] = {'like': summarize(sql_samples), 'index': summarize(index_samples)}
+        cur.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=sizes_arg, default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+    dump({str(size): run(size, args.repeat) for size in args.sizes}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,40 @@ class Config:
     MYSQL_HOST = 'localhost'
     MYSQL_USER = 'root'
     MYSQL_PASSWORD = 'root'  # ← update this
-    MYSQL_DB = 'students_db'
\ No newline at end of file
+    MYSQL_DB = 'students_db'
+
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    STREAM_CHUNK_SIZE = 1000
+    SEARCH_INDEX_ENABLED = True
+    SEARCH_INDEX_MAX_IN = 5000  # larger candidate sets fall back to LIKE when filtering/sorting
+    TOKEN_CACHE_SIZE = 10000
+
+    DB_POOL_MIN_SIZE = 2
+    DB_POOL_MAX_SIZE = 10
+    DB_POOL_TIMEOUT = 5        # seconds to wait for a free connection
+    DB_POOL_RECYCLE = 3600     # reconnect connections older than this (0 = never)
+    DB_POOL_PING = True        # ping idle connections on checkout
+
+    IMPORT_BATCH_SIZE = 500
+    IMPORT_MAX_ERRORS = 1000   # per-row errors returned in the import report
+    BATCH_MAX_ITEMS = 1000     # operations per POST /students/batch
+
+    FRAGMENT_CACHE_SIZE = 5000  # rendered <li> rows kept for the HTML list
+
+    ETAG_VERSION_CACHE_SIZE = 10000
+    ETAG_VERSION_TTL = 60      # seconds a remembered row version answers If-None-Match
+
+    SEARCH_CACHE_SIZE = 1000
+    SEARCH_CACHE_TTL = 30      # seconds
+
+    PROFILE_SAMPLE_RATE = 0.0  # fraction of requests run under cProfile (0 = off)
+    PROFILE_SLOW_MS = 500      # log the profile of sampled requests slower than this
+
+    COMPRESSION_LEVEL = 6      # gzip/deflate level 1-9 (0 = off)
+    COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies go out as-is
+
+    RATE_LIMIT_PER_SEC = 20    # sustained requests per user (0 = no limit)
+    RATE_LIMIT_BURST = 40      # requests a user may send back to back
+    RATE_LIMIT_USERS = 10000   # buckets kept; an evicted user starts over with a full bucket
+    EXPENSIVE_MAX_CONCURRENCY = 4  # search/XML/stream/export requests in flight per process (0 = no cap)
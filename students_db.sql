@@ -14,9 +14,46 @@ CREATE TABLE students (
     last_name VARCHAR(100) NOT NULL,
     email VARCHAR(100) UNIQUE NOT NULL,
     program VARCHAR(100) NOT NULL,
-    year_level INT NOT NULL
+    year_level INT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 1
 );
 
+-- Existing databases: ALTER TABLE students ADD COLUMN version BIGINT NOT NULL DEFAULT 1;
+
+-- Global change counter. Every write takes the next value(s) for the
+-- version column (and for tombstones), so versions increase across the
+-- whole table and GET /students/changes can page through them.
+CREATE TABLE change_seq (
+    id TINYINT PRIMARY KEY,
+    value BIGINT NOT NULL
+);
+
+INSERT INTO change_seq (id, value) VALUES (1, 1);
+
+-- Deleted students, kept so change feed clients can drop their copy
+CREATE TABLE student_tombstones (
+    id INT PRIMARY KEY,
+    student_id VARCHAR(20) NOT NULL,
+    version BIGINT NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_tombstones_version ON student_tombstones (version);
+
+-- Access paths for the list filters and sort keys. InnoDB appends the
+-- primary key to every secondary index, which is what lets the id
+-- tie-breaker in ORDER BY ride the index too.
+CREATE INDEX idx_students_program_year ON students (program, year_level);
+CREATE INDEX idx_students_program_year_last ON students (program, year_level, last_name);
+CREATE INDEX idx_students_program_last ON students (program, last_name);
+CREATE INDEX idx_students_year_last ON students (year_level, last_name);
+CREATE INDEX idx_students_last_name ON students (last_name);
+CREATE INDEX idx_students_year ON students (year_level);
+-- Mixed directions need a matching index; the id tie-breaker follows the
+-- last key, so it is stored descending here as well.
+CREATE INDEX idx_students_last_year_desc ON students (last_name, year_level DESC, id DESC);
+CREATE INDEX idx_students_version ON students (version);
+
 -- Insert 20+ sample students
 INSERT INTO students (student_id, first_name, last_name, email, program, year_level) VALUES
 ('2021-0001', 'Juan', 'Dela Cruz', 'juan@university.edu', 'Computer Science', 3),
@@ -39,4 +76,8 @@ INSERT INTO students (student_id, first_name, last_name, email, program, year_le
 ('2021-0018', 'Rosa', 'Ng', 'rosa@university.edu', 'Computer Science', 2),
 ('2021-0019', 'Antonio', 'Ko', 'antonio@university.edu', 'Data Science', 4),
 ('2021-0020', 'Luna', 'Fei', 'luna@university.edu', 'Information Technology', 1),
-('2021-0021', 'Victor', 'Ma', 'victor@university.edu', 'Cybersecurity', 3);
\ No newline at end of file
+('2021-0021', 'Victor', 'Ma', 'victor@university.edu', 'Cybersecurity', 3);
+
+-- Give the sample rows their own change versions
+UPDATE students SET version = id;
+UPDATE change_seq SET value = (SELECT COALESCE(MAX(version), 1) FROM students) WHERE id = 1;
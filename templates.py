@@ -0,0 +1,250 @@
+# HTML page templates, compiled once at startup into the registry in app.py
+
+REGISTER_HTML = '''\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Register • Student Portal</title>
+    <style>
+        body { font-family: Arial, sans-serif; background: #f5f7ff; margin: 0; padding: 0; }
+        .container { max-width: 500px; margin: 60px auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
+        h2 { text-align: center; color: #1E3A8A; margin-bottom: 25px; }
+        input { width: 100%; padding: 12px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; box-sizing: border-box; }
+        button { width: 100%; padding: 12px; background: #1E3A8A; color: white; border: none; border-radius: 5px; font-size: 16px; cursor: pointer; }
+        button:hover { background: #1a3070; }
+        a { display: block; text-align: center; margin-top: 15px; color: #1E3A8A; text-decoration: none; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>🎓 Register</h2>
+        <form method="POST">
+            <input type="text" name="username" placeholder="Username" required>
+            <input type="password" name="password" placeholder="Password" required>
+            <button type="submit">Create Account</button>
+        </form>
+        <a href="/login">← Already have an account?</a>
+    </div>
+</body>
+</html>
+'''
+
+LOGIN_HTML = '''\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Login • Student Portal</title>
+    <style>
+        body { font-family: Arial, sans-serif; background: #f5f7ff; margin: 0; padding: 0; }
+        .container { max-width: 500px; margin: 60px auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
+        h2 { text-align: center; color: #1E3A8A; margin-bottom: 25px; }
+        input { width: 100%; padding: 12px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; box-sizing: border-box; }
+        button { width: 100%; padding: 12px; background: #1E3A8A; color: white; border: none; border-radius: 5px; font-size: 16px; cursor: pointer; }
+        button:hover { background: #1a3070; }
+        a { display: block; text-align: center; margin-top: 15px; color: #1E3A8A; text-decoration: none; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>🎓 Login</h2>
+        <form method="POST">
+            <input type="text" name="username" placeholder="Username" required>
+            <input type="password" name="password" placeholder="Password" required>
+            <button type="submit">Sign In</button>
+        </form>
+        <a href="/register">← Don't have an account?</a>
+    </div>
+</body>
+</html>
+'''
+
+STUDENT_FORM_HTML = '''\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Add Student</title>
+    <style>
+        body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
+        .container { max-width: 600px; margin: auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
+        h2 { color: #1E3A8A; margin-bottom: 20px; }
+        input { width: 100%; padding: 10px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; }
+        button { padding: 10px 20px; background: #1E3A8A; color: white; border: none; border-radius: 5px; cursor: pointer; }
+        a { color: #1E3A8A; text-decoration: none; margin-top: 10px; display: inline-block; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>➕ Add New Student</h2>
+        <form method="POST">
+            <input name="student_id" placeholder="Student ID (e.g., 2021-0001)" required>
+            <input name="first_name" placeholder="First Name" required>
+            <input name="last_name" placeholder="Last Name" required>
+            <input name="email" type="email" placeholder="Email" required>
+            <input name="program" placeholder="Program" required>
+            <input name="year_level" type="number" min="1" max="4" placeholder="Year Level (1-4)" required>
+            <button type="submit">Add Student</button>
+        </form>
+        <a href="/students">← Cancel</a>
+    </div>
+</body>
+</html>
+'''
+
+STUDENT_ITEM_HTML = '''\
+<li>
+    <strong>{{s.student_id}}</strong>: {{s.first_name}} {{s.last_name}}<br>
+    {{s.program}}, Year {{s.year_level}} • {{s.email}}<br>
+    <a href="/students/{{s.id}}">View</a> |
+    <a href="/students/{{s.id}}/edit">Edit</a> |
+    <form class="inline" method="POST" action="/students/{{s.id}}/delete" onsubmit="return confirm('Delete this student?')">
+        <button type="submit">Delete</button>
+    </form>
+</li>
+'''
+
+STUDENT_LIST_HTML = '''\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Students • Student Portal</title>
+    <style>
+        body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
+        .container { max-width: 900px; margin: auto; background: white; padding: 25px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
+        h2 { color: #1E3A8A; }
+        .controls { margin: 15px 0; text-align: center; }
+        .controls a { margin: 0 10px; color: #1E3A8A; text-decoration: none; }
+        form.inline { display: inline; }
+        form.inline button {
+            background: none;
+            border: none;
+            color: #1E3A8A;
+            text-decoration: underline;
+            cursor: pointer;
+            font-size: 14px;
+            padding: 0;
+            margin: 0 10px 0 0;
+        }
+        form { text-align: center; margin: 20px 0; }
+        input[type="text"] { padding: 8px; width: 300px; border: 1px solid #ccc; border-radius: 5px; }
+        button { padding: 8px 16px; background: #1E3A8A; color: white; border: none; border-radius: 5px; cursor: pointer; }
+        ul { list-style: none; padding: 0; }
+        li { padding: 15px; margin: 10px 0; background: #f9fbff; border-left: 4px solid #1E3A8A; }
+        .nav { margin-top: 20px; text-align: center; }
+        .nav a { margin: 0 10px; color: #1E3A8A; text-decoration: none; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>🎓 Student List</h2>
+        <div class="controls">
+            <a href="/students?format=json">[JSON]</a>
+            <a href="/students?format=xml">[XML]</a>
+        </div>
+        <form method="GET">
+            <input type="text" name="search" placeholder="Search by name/email/program" value="{{search}}">
+            <button type="submit">Search</button>
+        </form>
+        <p><a href="/students/new" style="color:#1E3A8A">➕ Add New Student</a></p>
+        <ul>
+        {% for item in items %}{{ item }}{% endfor %}
+        </ul>
+        <div class="nav">
+            {% if prev_cursor %}<a href="/students?before={{prev_cursor|urlencode}}&limit={{limit}}{% if search %}&search={{search|urlencode}}{% endif %}{% if query %}&{{query}}{% endif %}">← Prev</a>{% endif %}
+            {% if next_cursor %}<a href="/students?cursor={{next_cursor|urlencode}}&limit={{limit}}{% if search %}&search={{search|urlencode}}{% endif %}{% if query %}&{{query}}{% endif %}">Next →</a>{% endif %}
+        </div>
+        <div class="nav">
+            <a href="/">Home</a> | <a href="/logout">Logout</a>
+        </div>
+    </div>
+</body>
+</html>
+'''
+
+STUDENT_DETAIL_HTML = '''\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Student Details</title>
+    <style>
+        body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
+        .container { max-width: 600px; margin: auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
+        h2 { color: #1E3A8A; }
+        p { margin: 10px 0; }
+        a { display: inline-block; margin: 5px 10px 0 0; padding: 8px 16px; background: #1E3A8A; color: white; text-decoration: none; border-radius: 5px; }
+        form.inline { display: inline; }
+        form.inline button {
+            padding: 8px 16px; background: #d32f2f; color: white; border: none; border-radius: 5px; cursor: pointer;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>🎓 {{student.first_name}} {{student.last_name}}</h2>
+        <p><strong>ID:</strong> {{student.student_id}}</p>
+        <p><strong>Email:</strong> {{student.email}}</p>
+        <p><strong>Program:</strong> {{student.program}}</p>
+        <p><strong>Year:</strong> {{student.year_level}}</p>
+        <a href="/students/{{student.id}}/edit">✏️ Edit</a>
+        <form class="inline" method="POST" action="/students/{{student.id}}/delete" onsubmit="return confirm('Are you sure?')">
+            <button type="submit">🗑️ Delete</button>
+        </form>
+        <a href="/students">← Back</a>
+    </div>
+</body>
+</html>
+'''
+
+STUDENT_EDIT_HTML = '''\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Edit Student</title>
+    <style>
+        body { font-family: Arial, sans-serif; background: #f5f7ff; padding: 20px; }
+        .container { max-width: 600px; margin: auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }
+        h2 { color: #1E3A8A; margin-bottom: 20px; }
+        input { width: 100%; padding: 10px; margin: 10px 0; border: 1px solid #ccc; border-radius: 5px; }
+        button { padding: 10px 20px; background: #1E3A8A; color: white; border: none; border-radius: 5px; cursor: pointer; }
+        a { color: #1E3A8A; text-decoration: none; margin-top: 10px; display: inline-block; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>✏️ Edit Student</h2>
+        <form method="POST" action="/students/{{s.id}}/update">
+            <input name="student_id" value="{{s.student_id}}" required>
+            <input name="first_name" value="{{s.first_name}}" required>
+            <input name="last_name" value="{{s.last_name}}" required>
+            <input name="email" type="email" value="{{s.email}}" required>
+            <input name="program" value="{{s.program}}" required>
+            <input name="year_level" type="number" min="1" max="4" value="{{s.year_level}}" required>
+            <button type="submit">Save Changes</button>
+        </form>
+        <a href="/students/{{s.id}}">← Cancel</a>
+    </div>
+</body>
+</html>
+'''
+
+INDEX_HTML = '''\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Student Portal</title>
+    <style>
+        body { font-family: Arial, sans-serif; background: #f5f7ff; display: flex; justify-content: center; align-items: center; height: 100vh; margin: 0; }
+        .box { text-align: center; background: white; padding: 40px; border-radius: 15px; box-shadow: 0 0 30px rgba(0,0,0,0.15); }
+        h1 { color: #1E3A8A; margin-bottom: 30px; }
+        .btn { display: block; width: 200px; margin: 12px auto; padding: 12px; background: #1E3A8A; color: white; text-decoration: none; border-radius: 8px; }
+        .btn:hover { background: #1a3070; }
+    </style>
+</head>
+<body>
+    <div class="box">
+        <h1>🎓 Student Management Portal</h1>
+        <a href="/login" class="btn">Login</a>
+        <a href="/register" class="btn">Register</a>
+    </div>
+</body>
+</html>
+'''
@@ -0,0 +1,82 @@
+# Keyset pagination SQL: sort parsing, seek conditions and cursor round-trips.
+# Only builds SQL, so no database is needed; mysqlclient must be importable.
+import pytest
+
+pytest.importorskip('MySQLdb')
+
+from app import DEFAULT_SORT, app, page_query, parse_sort
+
+
+def sort_for(query):
+    with app.test_request_context('/students?' + query):
+        return parse_sort()
+
+
+def test_default_sort_is_id_ascending():
+    sort = sort_for('')
+    assert sort is DEFAULT_SORT
+    assert sort.order_by() == 'id ASC'
+    assert sort.order_by(reverse=True) == 'id DESC'
+    assert sort.seek(10) == ('(id) > (%s)', [10])
+    assert sort.seek(10, reverse=True) == ('(id) < (%s)', [10])
+
+
+def test_tie_breaker_follows_last_key():
+    assert sort_for('sort=last_name').order_by() == 'last_name ASC, id ASC'
+    assert sort_for('sort=program,-year_level').order_by() == 'program ASC, year_level DESC, id DESC'
+
+
+def test_uniform_directions_use_row_constructor():
+    sort = sort_for('sort=-last_name')
+    assert sort.seek(['Reyes', 7]) == ('(last_name, id) < (%s, %s)', ['Reyes', 7])
+    assert sort.seek(['Reyes', 7], reverse=True) == ('(last_name, id) > (%s, %s)', ['Reyes', 7])
+
+
+def test_mixed_directions_expand_to_or():
+    sort = sort_for('sort=last_name,-year_level')
+    assert sort.order_by() == 'last_name ASC, year_level DESC, id DESC'
+    cond, params = sort.seek(['Cruz', 3, 40])
+    assert cond == ('((last_name > %s) OR (last_name = %s AND year_level < %s)'
+                    ' OR (last_name = %s AND year_level = %s AND id < %s))')
+    assert params == ['Cruz', 'Cruz', 3, 'Cruz', 3, 40]
+    cond, params = sort.seek(['Cruz', 3, 40], reverse=True)
+    assert cond == ('((last_name < %s) OR (last_name = %s AND year_level > %s)'
+                    ' OR (last_name = %s AND year_level = %s AND id > %s))')
+    assert params == ['Cruz', 'Cruz', 3, 'Cruz', 3, 40]
+
+
+def test_cursor_round_trip():
+    sort = sort_for('sort=last_name,-year_level')
+    names = ['id', 'last_name', 'year_level']
+    token = sort.cursor((40, 'Dela Cruz', 3), names)
+    assert isinstance(token, str) and '=' not in token
+    assert sort.parse_cursor(token) == ['Dela Cruz', 3, 40]
+    assert DEFAULT_SORT.cursor((40, 'Dela Cruz', 3), names) == 40
+    assert DEFAULT_SORT.parse_cursor('40') == 40
+
+
+@pytest.mark.parametrize('raw', ['abc', 'not base64!', 'WzFd'])
+def test_invalid_cursor(raw):
+    # 'WzFd' decodes to [1]: valid JSON, wrong number of keys
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        sort_for('sort=last_name,-year_level').parse_cursor(raw)
+
+
+def test_unknown_sort_column():
+    with pytest.raises(ValueError, match='Cannot sort by password'):
+        sort_for('sort=password')
+
+
+def test_page_query_after_and_before():
+    sort = sort_for('sort=last_name,-year_level')
+    after = ['Cruz', 3, 40]
+    sql, params = page_query(['program = %s'], ['IT'], 20, after=after, sort=sort)
+    assert sql.startswith('SELECT id, student_id, first_name, last_name, email, program, year_level FROM students WHERE (program = %s) AND (((last_name > %s)')
+    assert sql.endswith(' ORDER BY last_name ASC, year_level DESC, id DESC LIMIT %s')
+    assert params == ['IT', 'Cruz', 'Cruz', 3, 'Cruz', 3, 40, 21]
+
+    # before= pages backwards: flipped order and comparisons, rows reversed by the caller
+    sql, params = page_query([], [], 20, before=after, sort=sort)
+    assert ' WHERE (((last_name < %s) OR ' in sql
+    assert sql.endswith(' ORDER BY last_name DESC, year_level ASC, id ASC LIMIT %s')
+    assert params == ['Cruz', 'Cruz', 3, 'Cruz', 3, 40, 21]
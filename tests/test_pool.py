@@ -0,0 +1,129 @@
+# MySQLPool against a fake connect factory: no MySQL server needed, but
+# mysqlclient must be importable since app.py imports it at module level.
+import threading
+import time
+
+import pytest
+
+MySQLdb = pytest.importorskip('MySQLdb')
+
+from flask import Flask, request
+
+from app import MySQLPool, PoolTimeout, pool_timeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+        self.rollbacks = 0
+
+    def ping(self):
+        if self.broken:
+            raise MySQLdb.OperationalError(2006, 'MySQL server has gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**config):
+    app = Flask('pooltest')
+    app.config.update(DB_POOL_MIN_SIZE=0, DB_POOL_MAX_SIZE=4, DB_POOL_TIMEOUT=5,
+                      DB_POOL_RECYCLE=0, DB_POOL_PING=True)
+    app.config.update(config)
+    made = []
+
+    def connect():
+        conn = FakeConnection()
+        made.append(conn)
+        return conn
+
+    pool = MySQLPool(app, connect=connect)
+    app.register_error_handler(PoolTimeout, pool_timeout)
+
+    @app.route('/conn')
+    def conn():
+        if request.args.get('hold'):
+            time.sleep(float(request.args['hold']))
+        return {'conn': made.index(pool.connection)}
+
+    return app, pool, made
+
+
+def test_requests_reuse_one_connection():
+    app, pool, made = make_pool()
+    client = app.test_client()
+    seen = {client.get('/conn').get_json()['conn'] for _ in range(50)}
+    stats = pool.stats()
+    assert seen == {0}
+    assert stats['connects'] == 1
+    assert stats['checkouts'] == 50
+    assert stats['in_use'] == 0 and stats['idle'] == 1
+    assert made[0].rollbacks == 50
+
+
+def test_threads_share_at_most_max_size_connections():
+    app, pool, made = make_pool(DB_POOL_MAX_SIZE=4)
+    threads, per_thread, errors = 16, 25, []
+
+    def worker():
+        client = app.test_client()
+        for _ in range(per_thread):
+            resp = client.get('/conn?hold=0.001')
+            if resp.status_code != 200:
+                errors.append(resp.status_code)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    stats = pool.stats()
+    assert errors == []
+    assert stats['connects'] <= app.config['DB_POOL_MAX_SIZE']
+    assert stats['checkouts'] == threads * per_thread
+    assert stats['checkouts'] >= 10 * stats['connects']
+    assert stats['in_use'] == 0 and stats['size'] == stats['connects']
+
+
+def test_exhausted_pool_returns_503():
+    app, pool, made = make_pool(DB_POOL_MAX_SIZE=1, DB_POOL_TIMEOUT=0.05)
+    held = pool.checkout()
+    try:
+        resp = app.test_client().get('/conn?format=json')
+    finally:
+        pool.checkin(held)
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After'] == '1'
+    assert 'error' in resp.get_json()
+    assert pool.stats()['timeouts'] == 1
+    assert app.test_client().get('/conn').status_code == 200
+
+
+def test_recycle_replaces_old_connection():
+    app, pool, made = make_pool(DB_POOL_RECYCLE=60)
+    client = app.test_client()
+    client.get('/conn')
+    conn, created = pool.idle.pop()
+    pool.idle.append((conn, created - 120))
+
+    assert client.get('/conn').get_json()['conn'] == 1
+    stats = pool.stats()
+    assert stats['recycled'] == 1 and stats['connects'] == 2 and stats['size'] == 1
+    assert made[0].closed
+
+
+def test_ping_failure_replaces_connection():
+    app, pool, made = make_pool()
+    client = app.test_client()
+    client.get('/conn')
+    made[0].broken = True
+
+    assert client.get('/conn').get_json()['conn'] == 1
+    stats = pool.stats()
+    assert stats['ping_failures'] == 1 and stats['connects'] == 2 and stats['size'] == 1
+    assert made[0].closed